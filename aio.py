@@ -0,0 +1,224 @@
+"""Асинхронный режим опроса: много запросов к API в одном потоке."""
+import asyncio
+import logging
+import os
+import time
+from http import HTTPStatus
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+import decoder
+import metrics
+import profiling
+from cohort import lease_expired, next_delay, save_polled, stop_tenant
+from exception import (ApiResponseError,
+                       FatalError,
+                       RateLimitedError,
+                       ResponseCodeError)
+from homework import (CYCLE_DEADLINE,
+                      ENDPOINT,
+                      HTTP_CONNECT_TIMEOUT,
+                      HTTP_READ_TIMEOUT,
+                      circuits,
+                      fetch_api_answer,
+                      process_response,
+                      quota_delay,
+                      raise_if_fatal,
+                      raise_throttled,
+                      record_failure,
+                      record_response,
+                      retry_pause,
+                      send_to_chat)
+from scheduler import PollSchedule
+from sender import recipients
+from shards import Shard
+from state import DEFAULT_TENANT
+from tenants import TenantRegistry
+from tracker import StatusTracker
+
+POLL_CONCURRENCY = int(os.getenv('POLL_CONCURRENCY', 100))
+
+logger = logging.getLogger(__name__)
+
+
+async def get_api_answer(session, current_timestamp: int,
+                         headers: dict, deadline: float = None) -> dict:
+    """асинхронно получаем ответ с API домашки.
+
+    deadline - момент time.monotonic(), позже которого не ждём ответа.
+    Без aiohttp запрос уходит в пул потоков через синхронный
+    fetch_api_answer. Ожидание квоты не входит в метрику запроса.
+    """
+    if deadline is None:
+        deadline = time.monotonic() + CYCLE_DEADLINE
+    loop = asyncio.get_running_loop()
+    if session is None:
+        return await loop.run_in_executor(
+            None, fetch_api_answer, current_timestamp, headers, deadline)
+    delay = await loop.run_in_executor(None, quota_delay, headers, deadline)
+    if delay:
+        await asyncio.sleep(delay)
+    return await request_api_answer(session, current_timestamp, headers,
+                                    deadline)
+
+
+def request_timeout(deadline: float):
+    """таймаут aiohttp на запрос, который не выходит за бюджет цикла."""
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise ApiResponseError('бюджет цикла исчерпан до запроса')
+    return aiohttp.ClientTimeout(total=remaining,
+                                 connect=HTTP_CONNECT_TIMEOUT,
+                                 sock_read=HTTP_READ_TIMEOUT)
+
+
+@metrics.timed('async_get_api_answer')
+async def request_api_answer(session, current_timestamp: int,
+                             headers: dict, deadline: float) -> dict:
+    """запрос к API домашки через aiohttp без ожидания квоты."""
+    params = {'from_date': current_timestamp}
+    timeout = request_timeout(deadline)
+    try:
+        async with session.get(ENDPOINT, headers=headers, params=params,
+                               timeout=timeout) as homework_statuses:
+            if homework_statuses.status == HTTPStatus.TOO_MANY_REQUESTS:
+                raise_throttled(headers,
+                                homework_statuses.headers.get('Retry-After'))
+            if homework_statuses.status != HTTPStatus.OK:
+                raise ResponseCodeError(
+                    f'Ожидался код 200, а получен: '
+                    f'{homework_statuses.status}, '
+                    f'параметры запроса: {params}!',
+                    homework_statuses.status)
+            body = await homework_statuses.read()
+            record_response(body)
+            try:
+                return decoder.loads(body)
+            except ValueError as error:
+                raise ApiResponseError(
+                    f'неудалось получить json формат: {error}')
+    except (ResponseCodeError, ApiResponseError, RateLimitedError):
+        raise
+    except Exception:
+        raise ApiResponseError(
+            f'Адрес {ENDPOINT} недоступен! '
+            f'параметры запроса: {params}')
+
+
+async def send_message(bot, chat_id, message: str):
+    """асинхронная отправка сообщения, бот работает в пуле потоков."""
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, send_to_chat, bot, chat_id, message)
+
+
+async def fetch_with_retries(session, current_timestamp: int,
+                             headers: dict,
+                             tenant: str = DEFAULT_TENANT) -> dict:
+    """get_api_answer с немедленными повторами по таблице политик."""
+    deadline = time.monotonic() + CYCLE_DEADLINE
+    attempt = 0
+    while True:
+        circuits.check(ENDPOINT, tenant)
+        try:
+            return await get_api_answer(session, current_timestamp, headers,
+                                        deadline)
+        except Exception as error:
+            pause = retry_pause(error, attempt, deadline)
+            if pause is None:
+                raise
+        attempt += 1
+        await asyncio.sleep(pause)
+
+
+async def poll_once(session, bot, chat_id, headers: dict,
+                    current_timestamp: int, tracker: StatusTracker = None,
+                    tenant: str = DEFAULT_TENANT,
+                    schedule: PollSchedule = None) -> int:
+    """один асинхронный цикл опроса, возвращаем новую метку времени.
+
+    Разбор ответа и отправка сообщений идут в пуле потоков.
+    """
+    try:
+        response = await fetch_with_retries(session, current_timestamp,
+                                            headers, tenant)
+        loop = asyncio.get_running_loop()
+        current_timestamp = await loop.run_in_executor(
+            None, process_response, bot, chat_id, response,
+            current_timestamp, tracker, tenant, schedule)
+    except Exception as error:
+        message = record_failure(error, tenant, schedule)
+        if message is not None:
+            await send_message(bot, recipients(chat_id)[0], message)
+        raise_if_fatal(error)
+    else:
+        circuits.success(ENDPOINT, tenant)
+    return current_timestamp
+
+
+async def poll_tenant(semaphore: asyncio.Semaphore, session, bot, tenant,
+                      tracker: StatusTracker = None,
+                      shard: Shard = None) -> bool:
+    """опрос подопечного, не больше semaphore запросов одновременно.
+
+    False - аренда подопечного истекла, пока опрос ждал очереди.
+    """
+    async with semaphore:
+        if lease_expired(tenant, shard):
+            return False
+        try:
+            tenant.from_date = await poll_once(
+                session, bot, tenant.chat_id, tenant.headers,
+                tenant.from_date, tracker, tenant.name, tenant.poll_schedule)
+        except FatalError as error:
+            stop_tenant(tenant, error)
+            return True
+    tenant.reschedule()
+    return True
+
+
+async def poll_due(semaphore: asyncio.Semaphore, session, bot,
+                   registry: TenantRegistry, tracker: StatusTracker = None,
+                   shard: Shard = None):
+    """опрашиваем всех подопечных, у которых подошло время."""
+    due = registry.due()
+    if not due:
+        return
+    logger.debug('Опрашиваю подопечных: %s', len(due))
+    results = await asyncio.gather(
+        *(poll_tenant(semaphore, session, bot, tenant, tracker, shard)
+          for tenant in due),
+        return_exceptions=True)
+    save_polled(registry, due, results)
+
+
+async def run(bot, registry: TenantRegistry, tracker: StatusTracker = None,
+              concurrency: int = POLL_CONCURRENCY, shard: Shard = None):
+    """основной асинхронный цикл опроса всех подопечных или своей доли."""
+    semaphore = asyncio.Semaphore(concurrency)
+    session = None
+    if aiohttp is None:
+        logger.warning('aiohttp не установлен: запросы идут через пул '
+                       'потоков, одновременно не больше его размера, '
+                       'а не %s', concurrency)
+    else:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=concurrency),
+            timeout=aiohttp.ClientTimeout(total=CYCLE_DEADLINE,
+                                          connect=HTTP_CONNECT_TIMEOUT,
+                                          sock_read=HTTP_READ_TIMEOUT))
+    try:
+        loop = asyncio.get_running_loop()
+        while True:
+            if shard is not None:
+                await loop.run_in_executor(
+                    None, shard.assign, registry, tracker)
+            await poll_due(semaphore, session, bot, registry, tracker,
+                           shard)
+            profiling.profiler.tick()
+            await asyncio.sleep(next_delay(registry, shard))
+    finally:
+        if session is not None:
+            await session.close()
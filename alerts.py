@@ -0,0 +1,63 @@
+"""Подавление повторных уведомлений об одной и той же ошибке."""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from state import DEFAULT_TENANT
+
+# одна и та же ошибка уходит в чат не чаще раза в WINDOW секунд
+WINDOW = 3600
+MAX_ERRORS = 1024
+
+NUMBERS = re.compile(r'\d+')
+
+
+def error_key(error: Exception, tenant: str = DEFAULT_TENANT) -> tuple:
+    """ключ ошибки: класс и текст без чисел (меток времени, кодов)."""
+    return tenant, type(error).__name__, NUMBERS.sub('#', str(error))
+
+
+class ErrorAlerts:
+    """Ограниченный по размеру журнал недавних ошибок."""
+
+    def __init__(self, window: float = WINDOW, max_errors: int = MAX_ERRORS):
+        """в журнале не больше max_errors ключей, старые вытесняются."""
+        self.window = window
+        self.max_errors = max_errors
+        self._errors = OrderedDict()
+        self._failing = set()
+        self._lock = threading.Lock()
+
+    def check(self, error: Exception, tenant: str = DEFAULT_TENANT):
+        """сколько раз ошибка была подавлена или None, если слать не надо.
+
+        0 - ошибка новая, больше 0 - окно подавления истекло.
+        """
+        key = error_key(error, tenant)
+        now = time.monotonic()
+        with self._lock:
+            self._failing.add(tenant)
+            notified, suppressed = self._errors.pop(key, (None, 0))
+            if notified is not None and now - notified < self.window:
+                self._remember(key, notified, suppressed + 1)
+                return None
+            self._remember(key, now, 0)
+            return suppressed
+
+    def _remember(self, key: tuple, notified: float, suppressed: int):
+        self._errors[key] = notified, suppressed
+        while len(self._errors) > self.max_errors:
+            self._errors.popitem(last=False)
+
+    def recovered(self, tenant: str = DEFAULT_TENANT) -> bool:
+        """цикл прошёл успешно: True, если до этого были сбои."""
+        if tenant not in self._failing:
+            return False
+        with self._lock:
+            if tenant not in self._failing:
+                return False
+            self._failing.discard(tenant)
+            for key in [key for key in self._errors if key[0] == tenant]:
+                del self._errors[key]
+        return True
@@ -0,0 +1,195 @@
+"""Архив сырых ответов API и их воспроизведение.
+
+Ответы пишутся сжатыми кадрами в сегменты segment-<время>.seg, рядом
+лежит индекс .idx из записей фиксированной длины (время, смещение),
+поэтому начало интервала ищется двоичным поиском по mmap, без чтения
+сегмента в память.
+
+Воспроизведение записанного архива через фейкового бота:
+    python archive.py archive/ --since 1650000000 --realtime
+"""
+import argparse
+import bisect
+import glob
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+FRAME = struct.Struct('<dI')
+INDEX = struct.Struct('<dQ')
+SEGMENT_BYTES = 64 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class Recorder:
+    """Дописывает ответы API в сегменты архива."""
+
+    def __init__(self, directory: str, segment_bytes: int = SEGMENT_BYTES,
+                 level: int = 6):
+        """сегмент закрывается, когда вырастает больше segment_bytes."""
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.level = level
+        self._segment = None
+        self._index = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _open_segment(self):
+        self.close()
+        name = os.path.join(self.directory, f'segment-{time.time_ns():020d}')
+        self._segment = open(f'{name}.seg', 'ab')
+        self._index = open(f'{name}.idx', 'ab')
+
+    def append(self, body: bytes, timestamp: float = None):
+        """дописываем один ответ.
+
+        Время берём под блокировкой, чтобы в сегменте оно не убывало.
+        """
+        data = zlib.compress(body, self.level)
+        with self._lock:
+            timestamp = time.time() if timestamp is None else timestamp
+            if (self._segment is None
+                    or self._segment.tell() >= self.segment_bytes):
+                self._open_segment()
+            offset = self._segment.tell()
+            self._segment.write(FRAME.pack(timestamp, len(data)))
+            self._segment.write(data)
+            self._segment.flush()
+            self._index.write(INDEX.pack(timestamp, offset))
+            self._index.flush()
+
+    def close(self):
+        """закрываем текущий сегмент."""
+        for file in (self._segment, self._index):
+            if file is not None:
+                file.close()
+        self._segment = self._index = None
+
+
+class _Timestamps:
+    """Последовательность меток времени индекса для bisect."""
+
+    def __init__(self, index: mmap.mmap):
+        self.index = index
+
+    def __len__(self):
+        return len(self.index) // INDEX.size
+
+    def __getitem__(self, number: int) -> float:
+        return INDEX.unpack_from(self.index, number * INDEX.size)[0]
+
+
+def _mapped(path: str):
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def read_segment(path: str, since: float = None, until: float = None):
+    """ответы одного сегмента: пары (время, сырое тело).
+
+    Индекс даёт только место начала, since и until проверяются по
+    каждому кадру. Недописанный или битый кадр в конце сегмента
+    (процесс упал посреди записи) завершает чтение.
+    """
+    segment = _mapped(path)
+    index = _mapped(path[:-len('.seg')] + '.idx')
+    if segment is None or index is None:
+        return
+    try:
+        timestamps = _Timestamps(index)
+        start = 0 if since is None else bisect.bisect_left(timestamps, since)
+        if start >= len(timestamps):
+            return
+        _, offset = INDEX.unpack_from(index, start * INDEX.size)
+        while offset + FRAME.size <= len(segment):
+            timestamp, length = FRAME.unpack_from(segment, offset)
+            if until is not None and timestamp > until:
+                return
+            offset += FRAME.size
+            if offset + length > len(segment):
+                logger.warning('Недописанный кадр в конце %s', path)
+                return
+            if since is None or timestamp >= since:
+                try:
+                    body = zlib.decompress(segment[offset:offset + length])
+                except zlib.error as error:
+                    logger.warning('Битый кадр в %s: %s', path, error)
+                    return
+                yield timestamp, body
+            offset += length
+    finally:
+        segment.close()
+        index.close()
+
+
+def read_archive(directory: str, since: float = None, until: float = None):
+    """все ответы архива по порядку записи."""
+    for path in sorted(glob.glob(os.path.join(directory, '*.seg'))):
+        yield from read_segment(path, since, until)
+
+
+class ReplayBot:
+    """Бот, который только считает сообщения."""
+
+    def __init__(self):
+        """сообщений и ошибок пока нет."""
+        self.messages = 0
+        self.errors = 0
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        """считаем сообщение."""
+        self.messages += 1
+
+
+def replay(directory: str, since: float = None, until: float = None,
+           realtime: bool = False, speed: float = 1.0) -> ReplayBot:
+    """прогоняем архив через check_response, parse_status и отправку."""
+    import decoder
+    from homework import process_response
+    from tracker import StatusTracker
+
+    bot = ReplayBot()
+    tracker = StatusTracker()
+    previous = None
+    current_timestamp = 0
+    for timestamp, body in read_archive(directory, since, until):
+        if realtime and previous is not None:
+            time.sleep(max(timestamp - previous, 0) / speed)
+        previous = timestamp
+        try:
+            current_timestamp = process_response(
+                bot, 0, decoder.loads(body), current_timestamp, tracker)
+        except Exception:
+            # битые ответы тоже попадают в архив, считаем их отдельно
+            bot.errors += 1
+    return bot
+
+
+def main():
+    """воспроизведение архива из командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('directory', help='каталог с сегментами архива')
+    parser.add_argument('--since', type=float, help='начало, unix time')
+    parser.add_argument('--until', type=float, help='конец, unix time')
+    parser.add_argument('--realtime', action='store_true',
+                        help='соблюдать паузы между ответами')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='ускорение при --realtime')
+    args = parser.parse_args()
+    started = time.perf_counter()
+    bot = replay(args.directory, args.since, args.until,
+                 args.realtime, args.speed)
+    print(f'сообщений: {bot.messages}, ошибок: {bot.errors}, '
+          f'за {time.perf_counter() - started:.2f} с')
+
+
+if __name__ == '__main__':
+    main()
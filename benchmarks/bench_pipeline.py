@@ -0,0 +1,120 @@
+"""Микробенчмарки обработки ответа API.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_pipeline.py            # замер
+    python benchmarks/bench_pipeline.py --save     # записать baseline
+    python benchmarks/bench_pipeline.py --compare  # сравнить с baseline
+"""
+import argparse
+import json
+import sys
+import timeit
+from os.path import abspath, dirname, join
+
+root_dir = dirname(dirname(abspath(__file__)))
+sys.path.append(root_dir)
+
+import decoder  # noqa: E402
+import homework  # noqa: E402
+from models import Homework  # noqa: E402
+from tests.fixtures.fixture_data import make_response  # noqa: E402
+from tracker import StatusTracker  # noqa: E402
+
+SIZES = (1, 100, 10000)
+BASELINE_PATH = join(dirname(abspath(__file__)), 'baseline.json')
+# во сколько раз можно быть медленнее baseline без ошибки
+TOLERANCE = 1.25
+REPEAT = 5
+
+
+class NullBot:
+    """Бот, который никуда не отправляет."""
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        """ничего не делаем."""
+
+
+def cases(size: int) -> dict:
+    """замеряемые функции для ответа с size домашками."""
+    response = make_response(size)
+    homeworks = response['homeworks']
+    records = [Homework.from_dict(item) for item in homeworks]
+    body = json.dumps(response, ensure_ascii=False).encode('utf-8')
+    bot = NullBot()
+
+    def parse_all():
+        for homework_item in homeworks:
+            homework.parse_status(homework_item)
+
+    def parse_records():
+        for record in records:
+            homework.parse_status(record)
+
+    def render():
+        homework.report_homeworks(bot, 1, homeworks, StatusTracker())
+
+    found = {
+        'check_response': lambda: homework.check_response(response),
+        'parse_status': parse_all,
+        'parse_status_records': parse_records,
+        'build_records': lambda: [Homework.from_dict(item)
+                                  for item in homeworks],
+        'render_messages': render,
+    }
+    for backend, loads in decoder.BACKENDS.items():
+        found[f'decode_{backend}'] = lambda loads=loads: loads(body)
+    return found
+
+
+def measure(function) -> float:
+    """лучшее время одного вызова в секундах."""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=REPEAT, number=number)) / number
+
+
+def run() -> dict:
+    """замеряем все функции на всех размерах ответа."""
+    results = {}
+    for size in SIZES:
+        for name, function in cases(size).items():
+            key = f'{name}[{size}]'
+            results[key] = measure(function)
+            print(f'{key:<32} {results[key] * 1e6:>14.2f} мкс')
+    return results
+
+
+def compare(results: dict, baseline: dict) -> list:
+    """замеры, ставшие медленнее baseline больше чем в TOLERANCE раз."""
+    regressions = []
+    for key, seconds in results.items():
+        expected = baseline.get(key)
+        if expected and seconds > expected * TOLERANCE:
+            regressions.append(f'{key}: {seconds * 1e6:.2f} мкс, '
+                               f'было {expected * 1e6:.2f} мкс')
+    return regressions
+
+
+def main():
+    """замер, сохранение или сравнение с baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--save', action='store_true',
+                        help='записать результаты в baseline.json')
+    parser.add_argument('--compare', action='store_true',
+                        help='сравнить с baseline.json')
+    args = parser.parse_args()
+    results = run()
+    if args.save:
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+    if args.compare:
+        with open(BASELINE_PATH, encoding='utf-8') as file:
+            regressions = compare(results, json.load(file))
+        for regression in regressions:
+            print(f'Регрессия: {regression}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Холодный старт бота: импорт, отказ без токенов и первый опрос.
+
+Каждый замер - новый процесс python, API практикума и Bot API - локальные
+заглушки. Запуск из корня репозитория:
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from os.path import abspath, dirname
+
+root_dir = dirname(dirname(abspath(__file__)))
+sys.path.append(root_dir)
+
+from loadtest.stubs import (API_PATH,  # noqa: E402
+                            PracticumHandler,
+                            PracticumStub,
+                            TelegramHandler,
+                            TelegramStub,
+                            serve)
+
+BOT_TOKEN = '123456:' + 'x' * 35
+IMPORT_CODE = ('import time; started = time.perf_counter(); '
+               'import homework; print(time.perf_counter() - started)')
+MAIN_CODE = ('import sys, homework; homework.ENDPOINT = sys.argv[1]; '
+             'homework.main()')
+# сколько ждать первого запроса к API, с
+FIRST_POLL_TIMEOUT = 30
+
+
+def child_env(directory: str, bot_url: str = None, tokens=True) -> dict:
+    """окружение процесса бота: токены для заглушек или без токенов."""
+    env = dict(os.environ,
+               STATE_PATH=os.path.join(directory, 'state.sqlite3'),
+               PYTHONPATH=root_dir)
+    for name in ('PRACTICUM', 'TELEGRAM', 'TELEGRAM_CHATID'):
+        env.pop(name, None)
+    if tokens:
+        env.update(PRACTICUM='token', TELEGRAM=BOT_TOKEN,
+                   TELEGRAM_CHATID='1', TELEGRAM_API_URL=bot_url)
+    return env
+
+
+def measure_import(directory: str) -> float:
+    """время import homework в новом процессе."""
+    output = subprocess.run(
+        [sys.executable, '-c', IMPORT_CODE], cwd=directory,
+        env=child_env(directory, 'http://127.0.0.1/bot'),
+        capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_fail_fast(directory: str) -> float:
+    """от запуска до выхода процесса без токенов."""
+    started = time.perf_counter()
+    subprocess.run([sys.executable, '-c', MAIN_CODE, 'http://127.0.0.1/'],
+                   cwd=directory, env=child_env(directory, tokens=False),
+                   capture_output=True)
+    return time.perf_counter() - started
+
+
+def measure_first_poll(directory: str, practicum: PracticumStub,
+                       api_url: str, bot_url: str) -> float:
+    """от запуска процесса до первого запроса к API."""
+    requests_before = practicum.requests
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-c', MAIN_CODE, api_url], cwd=directory,
+        env=child_env(directory, bot_url),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while practicum.requests == requests_before:
+            if (process.poll() is not None
+                    or time.perf_counter() - started > FIRST_POLL_TIMEOUT):
+                raise RuntimeError('бот не дошёл до первого опроса')
+            time.sleep(0.001)
+        return time.perf_counter() - started
+    finally:
+        process.kill()
+        process.wait()
+
+
+def run(runs: int) -> dict:
+    """медианы всех замеров по runs процессам."""
+    practicum = PracticumStub()
+    api_server = serve(PracticumHandler, practicum)
+    bot_server = serve(TelegramHandler, TelegramStub())
+    for server in (api_server, bot_server):
+        # обрыв соединения убитым процессом бота - не ошибка замера
+        server.handle_error = lambda request, client_address: None
+    api_url = f'http://127.0.0.1:{api_server.server_address[1]}{API_PATH}'
+    bot_url = f'http://127.0.0.1:{bot_server.server_address[1]}/bot'
+    results = {'import': [], 'fail_fast': [], 'first_poll': []}
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for _ in range(runs):
+                results['import'].append(measure_import(directory))
+                results['fail_fast'].append(measure_fail_fast(directory))
+                results['first_poll'].append(measure_first_poll(
+                    directory, practicum, api_url, bot_url))
+    finally:
+        api_server.shutdown()
+        bot_server.shutdown()
+    return {name: statistics.median(values)
+            for name, values in results.items()}
+
+
+def main():
+    """печатаем медианы замеров."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+    for name, seconds in run(args.runs).items():
+        print(f'{name:<12} {seconds * 1e3:>10.1f} мс')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""Опрос API домашки сразу для многих подопечных в одном процессе."""
+import logging
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+import profiling
+from exception import FatalError
+from homework import (LOG_LEVEL,
+                      LOG_PATH,
+                      LOG_ROTATE_WHEN,
+                      LOG_SAMPLE_RATE,
+                      METRICS_PORT,
+                      STATE_PATH,
+                      TELEGRAM_TOKEN,
+                      configure_archive,
+                      configure_limiter,
+                      configure_transport,
+                      create_bot,
+                      exit_on_sigterm,
+                      poll_once)
+from logs import setup_logging
+from scheduler import MAX_INTERVAL
+from shards import LEASES_PATH, Shard
+from state import StateStore
+from tenants import TenantRegistry
+from tracker import StatusTracker
+
+TENANTS_PATH = os.getenv('TENANTS_PATH', 'tenants.sqlite3')
+POLL_WORKERS = int(os.getenv('POLL_WORKERS', 32))
+# threads - пул потоков, async - asyncio
+POLL_MODE = os.getenv('POLL_MODE', 'threads')
+# запас ожидания, чтобы не крутить пустой цикл
+MIN_SLEEP = 1
+
+logger = logging.getLogger(__name__)
+
+
+def lease_expired(tenant, shard: Shard = None) -> bool:
+    """аренда подопечного истекла, пока опрос ждал своей очереди."""
+    if shard is not None and not shard.holds(tenant.name):
+        logger.warning('Аренда %s истекла, опрос пропущен', tenant.name)
+        return True
+    return False
+
+
+def stop_tenant(tenant, error: FatalError):
+    """фатальный сбой: больше этого подопечного не опрашиваем."""
+    logger.critical('Опрос %s остановлен: %s', tenant.name, error)
+    tenant.disable()
+
+
+def save_polled(registry: TenantRegistry, due: list, results: list):
+    """сохраняем курсоры опрошенных, results - итог poll_tenant или сбой.
+
+    Пропущенных из-за аренды не сохраняем: их курсор мог продвинуть
+    новый владелец.
+    """
+    polled = set()
+    for tenant, result in zip(due, results):
+        if isinstance(result, Exception):
+            logger.error(result, exc_info=result)
+        if result is not False:
+            polled.add(tenant.name)
+    registry.save(polled)
+
+
+def poll_tenant(bot, tenant, tracker: StatusTracker = None,
+                shard: Shard = None) -> bool:
+    """один цикл опроса для подопечного, False - опрос пропущен.
+
+    Подопечного без живой аренды не опрашиваем: его мог забрать
+    другой воркер, пока опрос ждал своей очереди.
+    """
+    if lease_expired(tenant, shard):
+        return False
+    try:
+        tenant.from_date = poll_once(bot, tenant.chat_id, tenant.headers,
+                                     tenant.from_date, tracker, tenant.name,
+                                     tenant.poll_schedule)
+    except FatalError as error:
+        stop_tenant(tenant, error)
+        return True
+    tenant.reschedule()
+    return True
+
+
+def poll_due(bot, registry: TenantRegistry, executor: ThreadPoolExecutor,
+             tracker: StatusTracker = None, shard: Shard = None):
+    """опрашиваем всех подопечных, у которых подошло время."""
+    due = registry.due()
+    if not due:
+        return
+    logger.debug('Опрашиваю подопечных: %s', len(due))
+    futures = [executor.submit(poll_tenant, bot, tenant, tracker, shard)
+               for tenant in due]
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as error:
+            results.append(error)
+    save_polled(registry, due, results)
+
+
+def next_delay(registry: TenantRegistry, shard: Shard = None) -> float:
+    """пауза до следующего опроса или продления аренды."""
+    delay = min(registry.next_due() - time.time(), MAX_INTERVAL)
+    if shard is not None:
+        delay = min(delay, shard.renew_every)
+    return max(delay, MIN_SLEEP)
+
+
+def run(bot, registry: TenantRegistry, tracker: StatusTracker = None,
+        workers: int = POLL_WORKERS, shard: Shard = None):
+    """основной цикл опроса всех подопечных или только своей доли."""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            if shard is not None:
+                shard.assign(registry, tracker)
+            poll_due(bot, registry, executor, tracker, shard)
+            profiling.profiler.tick()
+            time.sleep(next_delay(registry, shard))
+
+
+def main():
+    """Запуск опроса подопечных из реестра."""
+    if not TELEGRAM_TOKEN:
+        logger.critical('Ошибка, проверьте токен телеграма в .env')
+        sys.exit('Ошибка, проверьте токен телеграма в .env')
+    registry = TenantRegistry(TENANTS_PATH)
+    logger.debug('Загружено подопечных: %s', len(registry))
+    shard = None
+    if LEASES_PATH:
+        if not registry.is_sqlite:
+            logger.critical('Для шардирования нужен реестр в SQLite')
+            sys.exit('Для шардирования нужен реестр в SQLite')
+        shard = Shard(LEASES_PATH).start()
+    signal.signal(signal.SIGTERM, exit_on_sigterm)
+    configure_transport(pool_size=POLL_WORKERS)
+    configure_archive()
+    configure_limiter()
+    bot = create_bot()
+    if METRICS_PORT:
+        metrics.serve(METRICS_PORT)
+    tracker = StatusTracker(StateStore(STATE_PATH))
+    profiling.install()
+    try:
+        if POLL_MODE == 'async':
+            import asyncio
+
+            import aio
+            asyncio.run(aio.run(bot, registry, tracker, shard=shard))
+        else:
+            run(bot, registry, tracker, shard=shard)
+    finally:
+        bot.stop()
+        if shard is not None:
+            shard.release()
+
+
+if __name__ == '__main__':
+    setup_logging(path=LOG_PATH,
+                  level=LOG_LEVEL,
+                  rotate_when=LOG_ROTATE_WHEN,
+                  sample_rate=LOG_SAMPLE_RATE)
+    main()
@@ -0,0 +1,38 @@
+"""Разбор JSON ответа API: orjson, если установлен, иначе stdlib json."""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKENDS = {'json': json.loads}
+if orjson is not None:
+    BACKENDS['orjson'] = orjson.loads
+
+backend = 'orjson' if orjson is not None else 'json'
+
+
+def use(name: str):
+    """выбираем библиотеку для разбора JSON."""
+    global backend
+    if name not in BACKENDS:
+        raise ValueError(f'декодер {name} недоступен, '
+                         f'есть только: {", ".join(BACKENDS)}')
+    backend = name
+
+
+def loads(data):
+    """разбираем JSON из bytes или str.
+
+    bytes передаются декодеру напрямую, без промежуточной строки.
+    """
+    return BACKENDS[backend](data)
+
+
+def decode_response(response):
+    """разбираем тело ответа один раз, по сырым байтам если они есть."""
+    content = getattr(response, 'content', None)
+    if isinstance(content, bytes):
+        return loads(content)
+    return response.json()
@@ -34,4 +34,23 @@ class ApiResponseError(HomeWorkBaseException):
 
 class ResponseCodeError(HomeWorkBaseException):
     """Коды ответа сервера, отличные от 200."""
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class RateLimitedError(NotSendsError):
+    """Квота запросов к API исчерпана."""
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(NotSendsError):
+    """Предохранитель разомкнут, запрос не делался."""
+    pass
+
+
+class FatalError(HomeWorkBaseException):
+    """Сбой, после которого повторять запросы бессмысленно."""
     pass
@@ -1,22 +1,37 @@
 """Бот, который запрашивает статус домашики на API яндекс.домашка."""
 import logging
 import os
+import signal
 import sys
 import time
 from http import HTTPStatus
 
-import requests
-import telegram
 from dotenv import load_dotenv
-from requests.exceptions import HTTPError
-from telegram import TelegramError
 
-from exception import (SendMessageError,
+import decoder
+import metrics
+import profiling
+import transport
+from alerts import ErrorAlerts
+from archive import Recorder
+from exception import (FatalError,
+                       SendMessageError,
                        ResponseCodeError,
                        ApiResponseError,
                        NotSendsError,
+                       RateLimitedError,
                        ResponseContentError,
                        ResponseContentTypeError)
+from logs import SAMPLED, setup_logging
+from models import Homework, Verdict
+from outbox import Outbox
+from policies import FATAL, Circuits, policy_for
+from ratelimit import QuotaLimiter, retry_after
+from scheduler import PollSchedule
+from sender import (DigestBot, LazyBot, MessageQueue, is_telegram_error,
+                    recipients)
+from state import DEFAULT_TENANT, StateStore
+from tracker import StatusTracker
 
 load_dotenv()
 
@@ -24,62 +39,196 @@ PRACTICUM_TOKEN = os.getenv('PRACTICUM')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHATID')
 RETRY_TIME = 600
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 10))
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 3))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 3.05))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 10))
+# бюджет времени на запрос к API в одном цикле, с повторами
+CYCLE_DEADLINE = float(os.getenv('CYCLE_DEADLINE', 30))
+# 0.95 - дублировать запрос дольше 95-го перцентиля, 0 - не дублировать
+HEDGE_PERCENTILE = float(os.getenv('HEDGE_PERCENTILE', 0))
+# запросов к API в секунду на все процессы и на один токен, 0 - без квоты
+API_RATE = float(os.getenv('API_RATE', 0))
+API_TOKEN_RATE = float(os.getenv('API_TOKEN_RATE', 0))
+RATE_LIMIT_PATH = os.getenv('RATE_LIMIT_PATH', 'ratelimit.sqlite3')
+STATE_PATH = os.getenv('STATE_PATH', 'state.sqlite3')
+SEND_WORKERS = int(os.getenv('SEND_WORKERS', 4))
+SEND_RATE = float(os.getenv('SEND_RATE', 30))
+CHAT_SEND_RATE = float(os.getenv('CHAT_SEND_RATE', 1))
+# база недоставленных сообщений для повторов, пусто - не хранить
+OUTBOX_PATH = os.getenv('OUTBOX_PATH', 'outbox.sqlite3')
+# чаты через запятую, куда кроме TELEGRAM_CHAT_ID идут статусы работ
+TELEGRAM_SUBSCRIBERS = os.getenv('TELEGRAM_SUBSCRIBERS', '')
+# окно сводки статусов в чат, с; 0 - каждый статус отдельным сообщением
+DIGEST_WINDOW = float(os.getenv('DIGEST_WINDOW', 0))
+DIGEST_MAX_ITEMS = int(os.getenv('DIGEST_MAX_ITEMS', 20))
+# свой Bot API сервер или заглушка, например http://localhost:8081/bot
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL')
+# соединений к Bot API: по одному на поток отправки и запас
+TELEGRAM_POOL_SIZE = int(os.getenv('TELEGRAM_POOL_SIZE', SEND_WORKERS + 4))
+TELEGRAM_CONNECT_TIMEOUT = float(os.getenv('TELEGRAM_CONNECT_TIMEOUT', 5))
+TELEGRAM_READ_TIMEOUT = float(os.getenv('TELEGRAM_READ_TIMEOUT', 5))
+ERROR_WINDOW = int(os.getenv('ERROR_WINDOW', 3600))
+LOG_PATH = os.getenv('LOG_PATH', 'main.log')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')
+# S, M, H, D, midnight - ротация по времени, иначе по размеру
+LOG_ROTATE_WHEN = os.getenv('LOG_ROTATE_WHEN')
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', 1))
+# 0 - не поднимать HTTP-сервер метрик
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+# каталог архива сырых ответов API, пусто - не записывать
+ARCHIVE_DIR = os.getenv('ARCHIVE_DIR')
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 
 HOMEWORK_VERDICTS = {
-    'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
-    'reviewing': 'Работа взята на проверку ревьюером.',
-    'rejected': 'Работа проверена: у ревьюера есть замечания.'
+    Verdict.APPROVED: 'Работа проверена: ревьюеру всё понравилось. Ура!',
+    Verdict.REVIEWING: 'Работа взята на проверку ревьюером.',
+    Verdict.REJECTED: 'Работа проверена: у ревьюера есть замечания.'
 }
 
+RECOVERED_MESSAGE = 'Работа программы восстановлена'
+
 logger = logging.getLogger(__name__)
+error_alerts = ErrorAlerts(window=ERROR_WINDOW)
+recorder = None
+limiter = None
+circuits = Circuits()
 
 
 def send_message(bot, message: str):
     """Отправка ботом сообщений в чат."""
-    try:
-        bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message)
-    except TelegramError:
+    send_to_chat(bot, TELEGRAM_CHAT_ID, message)
+
+
+@metrics.timed('send_message')
+def send_to_chat(bot, chat_id, message: str):
+    """Отправка ботом сообщений в заданный чат или всем подписчикам.
+
+    Сбой у одного подписчика не мешает остальным, ошибка - только если
+    сообщение не ушло никому.
+    """
+    chat_ids = recipients(chat_id)
+    failed = 0
+    for chat in chat_ids:
+        try:
+            bot.send_message(chat_id=chat, text=message)
+        except Exception as error:
+            if not is_telegram_error(error):
+                raise
+            failed += 1
+            logger.error('не удалось отправить сообщение в чат %s: %s',
+                         chat, error)
+    if failed == len(chat_ids):
         raise SendMessageError(
             f'не удалось отправить сообщение: "{message}"')
-    else:
-        logger.info('сообщение успешно отправлено')
+    logger.info('сообщение успешно отправлено')
 
 
 def get_api_answer(current_timestamp: int) -> dict:
     """получаем ответ с API домашки."""
+    return fetch_api_answer(current_timestamp, HEADERS)
+
+
+def quota_delay(headers: dict, deadline: float = None) -> float:
+    """сколько ждать общую квоту API перед запросом с этими заголовками.
+
+    Если квоты не дождаться до deadline, запрос не делаем.
+    """
+    if limiter is None:
+        return 0.0
+    budget = None if deadline is None else deadline - time.monotonic()
+    delay = limiter.reserve(headers.get('Authorization', ''),
+                            max_delay=budget)
+    if budget is not None and delay > budget:
+        raise RateLimitedError(
+            f'Квота запросов к API исчерпана, ждать {delay:.1f} с', delay)
+    return delay
+
+
+def raise_throttled(headers: dict, retry_after_header: str = None):
+    """API ответило 429: придерживаем запросы с токеном до Retry-After."""
+    seconds = retry_after(retry_after_header)
+    if limiter is not None:
+        limiter.block(headers.get('Authorization', ''), seconds)
+    raise RateLimitedError(
+        f'API ограничило частоту запросов, повтор через {seconds:.0f} с',
+        seconds)
+
+
+def record_response(body):
+    """пишем сырой ответ API в архив, если он включён."""
+    if recorder is not None and isinstance(body, bytes):
+        recorder.append(body)
+
+
+def hedge_quota(headers: dict) -> bool:
+    """квота на дубль запроса: берём, только если её не надо ждать."""
+    if limiter is None:
+        return True
+    return not limiter.reserve(headers.get('Authorization', ''),
+                               max_delay=0)
+
+
+def check_status_code(homework_statuses, params: dict):
+    """ответ API должен прийти с кодом 200, на 429 ждём Retry-After."""
+    if homework_statuses.status_code == HTTPStatus.TOO_MANY_REQUESTS:
+        raise_throttled(params['headers'],
+                        homework_statuses.headers.get('Retry-After'))
+    if homework_statuses.status_code != HTTPStatus.OK:
+        raise ResponseCodeError(
+            f'Ожидался код 200, а получен: '
+            f'{homework_statuses.status_code}, '
+            f'параметры запроса: {params}!',
+            homework_statuses.status_code)
+
+
+def fetch_api_answer(current_timestamp: int, headers: dict,
+                     deadline: float = None) -> dict:
+    """получаем ответ с API домашки с заданными заголовками.
+
+    deadline - момент time.monotonic(), позже которого не ждём ответа.
+    Ожидание квоты не входит в метрику запроса.
+    """
+    delay = quota_delay(headers, deadline)
+    if delay:
+        time.sleep(delay)
+    return request_api_answer(current_timestamp, headers, deadline)
+
+
+@metrics.timed('get_api_answer')
+def request_api_answer(current_timestamp: int, headers: dict,
+                       deadline: float = None) -> dict:
+    """запрос к API домашки без ожидания квоты."""
     params = dict(url=ENDPOINT,
-                  headers=HEADERS,
+                  headers=headers,
                   params={'from_date': current_timestamp})
     try:
-        logger.info(f'Начат запрос по адресу {ENDPOINT} '
-                    f'с парамметрами {params}')
-        homework_statuses = requests.get(**params)
-        if homework_statuses.status_code != HTTPStatus.OK:
-            raise ResponseCodeError(
-                f'Ожидался код 200, а получен: '
-                f'{homework_statuses.status_code}, '
-                f'параметры запроса: {params}!')
-    except ResponseCodeError:
+        logger.info('Начат запрос по адресу %s с парамметрами %s',
+                    ENDPOINT, params['params'])
+        homework_statuses = transport.get(
+            deadline=deadline, quota=lambda: hedge_quota(headers), **params)
+        check_status_code(homework_statuses, params)
+    except (ResponseCodeError, RateLimitedError):
         raise
     except Exception:
         raise ApiResponseError(
             f'Адрес {ENDPOINT} недоступен! '
             f'параметры запроса: {params}')
 
+    record_response(getattr(homework_statuses, 'content', None))
     try:
-        homework_statuses.json()
-    except HTTPError as error:
+        return decoder.decode_response(homework_statuses)
+    except ValueError as error:
         raise ApiResponseError(
             f'неудалось получить json формат: {error}')
-    else:
-        return homework_statuses.json()
 
 
+@metrics.timed('check_response')
 def check_response(response: dict) -> list:
     """проверяем наличие в респонсе словаря homeworks."""
-    logger.info(f'Начинаю проверку ответа сервера ({response})')
+    logger.info('Начинаю проверку ответа сервера (%s)', response,
+                extra=SAMPLED)
     if not isinstance(response, dict):
         raise TypeError(f'В {response} ожидается словарь, '
                         f'а вернулось - {type(response)}')
@@ -99,19 +248,19 @@ def check_response(response: dict) -> list:
     return homeworks
 
 
-def parse_status(homework: dict) -> str:
-    """парсим данные с ответа сервера."""
+@metrics.timed('parse_status')
+def parse_status(homework) -> str:
+    """парсим данные с ответа сервера: словарь или запись Homework."""
     logger.info('Начинаем собирать данные из homework')
-    homework_status = homework.get('status')
-    homework_name = homework.get('homework_name')
-    if homework_name is None:
-        raise KeyError(f"ключа 'homework_name' нет в {homework}"
-                       f"или вернулось None")
-    if homework_status not in HOMEWORK_VERDICTS:
-        raise ValueError(f"статуса {homework_status} нет в HOMEWORK_VERDICTS"
-                         f"или вернулось None")
-    verdict = HOMEWORK_VERDICTS[homework_status]
-    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+    if not isinstance(homework, Homework):
+        homework = Homework.from_dict(homework)
+    verdict = HOMEWORK_VERDICTS[homework.status]
+    return f'Изменился статус проверки работы "{homework.name}". {verdict}'
+
+
+def practicum_headers(token: str) -> dict:
+    """заголовки авторизации для токена практикума."""
+    return {'Authorization': f'OAuth {token}'}
 
 
 def check_tokens() -> bool:
@@ -119,43 +268,269 @@ def check_tokens() -> bool:
     return all([PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID])
 
 
+def report_homeworks(bot, chat_id, homework_list: list,
+                     tracker: StatusTracker = None,
+                     tenant: str = DEFAULT_TENANT) -> dict:
+    """шлём изменившиеся статусы всех домашек, возвращаем отправленное.
+
+    Битая запись в ответе не мешает остальным: её пропускаем с ошибкой в
+    логе, остальные статусы уходят, а курсор продвигается.
+    """
+    if tracker is None:
+        tracker = StatusTracker()
+    records = []
+    for homework in homework_list:
+        try:
+            if not isinstance(homework, dict):
+                raise TypeError(f'в homeworks ожидается словарь, '
+                                f'а получен {type(homework)}')
+            records.append(Homework.from_dict(homework))
+        except (KeyError, TypeError, ValueError) as error:
+            logger.error('Домашка %s пропущена: %s', homework, error)
+    delivered = {}
+    for homework in tracker.changes(records, tenant):
+        send_to_chat(bot, chat_id, parse_status(homework))
+        tracker.mark(homework, tenant)
+        delivered[homework.key] = homework.status.value
+    return delivered
+
+
+def process_response(bot, chat_id, response: dict, current_timestamp: int,
+                     tracker: StatusTracker = None,
+                     tenant: str = DEFAULT_TENANT,
+                     schedule: PollSchedule = None) -> int:
+    """обрабатываем ответ API, возвращаем новую метку времени."""
+    homework_list = check_response(response)
+    delivered = report_homeworks(
+        bot, chat_id, homework_list, tracker, tenant)
+    current_timestamp = response.get('current_date', current_timestamp)
+    if tracker is not None:
+        tracker.save_cycle(current_timestamp, delivered, tenant)
+    if schedule is not None:
+        if tracker is not None:
+            reviewing = tracker.has_status(Verdict.REVIEWING, tenant)
+        else:
+            reviewing = any(homework.get('status') == Verdict.REVIEWING
+                            for homework in homework_list)
+        schedule.success(changed=bool(delivered), reviewing=reviewing)
+    if error_alerts.recovered(tenant):
+        send_to_chat(bot, recipients(chat_id)[0], RECOVERED_MESSAGE)
+    metrics.mark_success()
+    return current_timestamp
+
+
+def error_message(error: Exception, tenant: str = DEFAULT_TENANT):
+    """текст уведомления о сбое или None, если такой уже отправляли."""
+    suppressed = error_alerts.check(error, tenant)
+    if suppressed is None:
+        return None
+    message = f'Сбой в работе программы: {error}'
+    if suppressed:
+        message += f' (повторялось {suppressed} раз)'
+    return message
+
+
+def retry_pause(error: Exception, attempt: int, deadline: float):
+    """пауза перед немедленным повтором или None, если не повторяем."""
+    policy = policy_for(error)
+    if attempt >= policy.retries:
+        return None
+    pause = policy.pause(attempt)
+    if time.monotonic() + pause >= deadline:
+        return None
+    logger.warning('Повтор запроса через %s с после сбоя: %s', pause, error)
+    return pause
+
+
+def fetch_with_retries(current_timestamp: int, headers: dict,
+                       deadline: float,
+                       tenant: str = DEFAULT_TENANT) -> dict:
+    """fetch_api_answer с немедленными повторами по таблице политик."""
+    attempt = 0
+    while True:
+        circuits.check(ENDPOINT, tenant)
+        try:
+            return fetch_api_answer(current_timestamp, headers, deadline)
+        except Exception as error:
+            pause = retry_pause(error, attempt, deadline)
+            if pause is None:
+                raise
+        attempt += 1
+        time.sleep(pause)
+
+
+def record_failure(error: Exception, tenant: str = DEFAULT_TENANT,
+                   schedule: PollSchedule = None):
+    """учитываем сбой цикла по его политике.
+
+    Возвращаем текст уведомления в телеграм или None.
+    """
+    metrics.errors.inc(type(error).__name__)
+    policy = policy_for(error)
+    circuits.failure(policy, ENDPOINT, tenant)
+    if schedule is not None:
+        schedule.error(policy.interval, policy.max_interval,
+                       getattr(error, 'retry_after', None) or 0)
+    if isinstance(error, NotSendsError):
+        logger.error(error, exc_info=True)
+        return None
+    logger.error('Сбой в работе программы: %s', error, exc_info=True)
+    return error_message(error, tenant)
+
+
+def raise_if_fatal(error: Exception):
+    """FatalError, если по политике повторять бессмысленно."""
+    if policy_for(error).action == FATAL:
+        raise FatalError(f'повторять запросы бессмысленно: {error}')
+
+
+def poll_once(bot, chat_id, headers: dict, current_timestamp: int,
+              tracker: StatusTracker = None,
+              tenant: str = DEFAULT_TENANT,
+              schedule: PollSchedule = None) -> int:
+    """один цикл опроса API, возвращаем новую метку времени.
+
+    Паузу до следующего цикла выставляет schedule, после сбоя - по
+    политике из таблицы policies.POLICIES.
+    """
+    deadline = time.monotonic() + CYCLE_DEADLINE
+    try:
+        response = fetch_with_retries(current_timestamp, headers, deadline,
+                                      tenant)
+        current_timestamp = process_response(
+            bot, chat_id, response, current_timestamp, tracker, tenant,
+            schedule)
+    except Exception as error:
+        message = record_failure(error, tenant, schedule)
+        if message is not None:
+            send_to_chat(bot, recipients(chat_id)[0], message)
+        raise_if_fatal(error)
+    else:
+        circuits.success(ENDPOINT, tenant)
+    return current_timestamp
+
+
+def configure_transport(pool_size: int = HTTP_POOL_SIZE):
+    """настраиваем пул соединений, таймауты и дублирование запросов."""
+    # 5xx повторяет таблица политик, транспорт - только соединение
+    transport.configure(pool_size=pool_size,
+                        retries=HTTP_RETRIES,
+                        connect_only=True,
+                        connect_timeout=HTTP_CONNECT_TIMEOUT,
+                        read_timeout=HTTP_READ_TIMEOUT,
+                        hedge_percentile=HEDGE_PERCENTILE)
+
+
+def configure_limiter(rate: float = API_RATE,
+                      token_rate: float = API_TOKEN_RATE,
+                      path: str = RATE_LIMIT_PATH):
+    """включаем общую для процессов квоту запросов к API."""
+    global limiter
+    if rate or token_rate:
+        limiter = QuotaLimiter(path, rate, token_rate)
+        logger.debug('Квота запросов к API: %s/с, на токен %s/с',
+                     rate, token_rate)
+
+
+def configure_archive(directory: str = ARCHIVE_DIR):
+    """включаем запись ответов API в архив, если задан каталог."""
+    global recorder
+    if directory:
+        recorder = Recorder(directory)
+        logger.debug('Ответы API пишутся в архив %s', directory)
+
+
+def telegram_bot(token: str = TELEGRAM_TOKEN,
+                 base_url: str = TELEGRAM_API_URL,
+                 pool_size: int = TELEGRAM_POOL_SIZE):
+    """один telegram.Bot на все потоки отправки.
+
+    Соединения keep-alive берутся из общего пула на pool_size, так что
+    потоки отправки не ждут друг друга и не открывают лишних
+    соединений.
+    """
+    import telegram
+    from telegram.utils.request import Request
+
+    request = Request(con_pool_size=pool_size,
+                      connect_timeout=TELEGRAM_CONNECT_TIMEOUT,
+                      read_timeout=TELEGRAM_READ_TIMEOUT)
+    return telegram.Bot(token=token, base_url=base_url, request=request)
+
+
+def create_bot():
+    """бот с очередью отправки, не блокирующей цикл опроса.
+
+    telegram импортируется и бот создаётся в потоке отправки при первом
+    сообщении, пока цикл опроса уже делает первый запрос. С DIGEST_WINDOW
+    сообщения чата уходят сводками, с OUTBOX_PATH недоставленные ждут
+    повтора в базе.
+    """
+    outbox = Outbox(OUTBOX_PATH) if OUTBOX_PATH else None
+    bot = MessageQueue(LazyBot(telegram_bot),
+                       workers=SEND_WORKERS,
+                       global_rate=SEND_RATE,
+                       chat_rate=CHAT_SEND_RATE,
+                       outbox=outbox).start()
+    if outbox is not None:
+        metrics.outbox_depth.set_function(lambda: outbox.depth)
+    if DIGEST_WINDOW:
+        bot = DigestBot(bot, window=DIGEST_WINDOW,
+                        max_items=DIGEST_MAX_ITEMS).start()
+    metrics.queue_depth.set_function(lambda: bot.depth)
+    return bot
+
+
+def exit_on_sigterm(signum, frame):
+    """SIGTERM завершает процесс через SystemExit, чтобы отработали finally.
+
+    Иначе очередь отправки - демон - умирает вместе с недоставленным.
+    """
+    logger.info('Получен SIGTERM, дожидаюсь отправки очереди')
+    sys.exit(128 + signum)
+
+
 def main():
     """Основная логика работы бота."""
     if not check_tokens():
         logger.critical('Ошибка, проверьте токены в .env')
         sys.exit('Ошибка, проверьте токены в .env')
-    bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    send_message(bot,
-                 'Начинаю запрашивать информацию о статусе работы')
-    current_timestamp = int(time.time())
-    logger.debug('Запуск')
-    while True:
-        try:
-            response = get_api_answer(current_timestamp)
-            homework_list = check_response(response)
-            if len(homework_list) > 0:
-                send_message(bot, parse_status(homework_list[0]))
-            current_timestamp = response.get('current_date', current_timestamp)
-        except NotSendsError as error:
-            logger.error(error, exc_info=True)
-        except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            logger.error(message, exc_info=True)
-            send_message(bot, message)
-        finally:
-            time.sleep(RETRY_TIME)
+    signal.signal(signal.SIGTERM, exit_on_sigterm)
+    bot = create_bot()
+    try:
+        if METRICS_PORT:
+            metrics.serve(METRICS_PORT)
+        configure_transport()
+        configure_archive()
+        configure_limiter()
+        send_message(bot,
+                     'Начинаю запрашивать информацию о статусе работы')
+        state = StateStore(STATE_PATH)
+        tracker = StatusTracker(state)
+        current_timestamp = state.load_cursor(default=int(time.time()))
+        schedule = PollSchedule(interval=RETRY_TIME)
+        logger.debug('Запуск с метки времени %s', current_timestamp)
+        profiling.install()
+        chat_ids = recipients(f'{TELEGRAM_CHAT_ID},{TELEGRAM_SUBSCRIBERS}')
+        while True:
+            try:
+                current_timestamp = poll_once(bot, chat_ids, HEADERS,
+                                              current_timestamp, tracker,
+                                              schedule=schedule)
+            except FatalError as error:
+                logger.critical(error)
+                sys.exit(str(error))
+            profiling.profiler.tick()
+            time.sleep(schedule.delay)
+    finally:
+        # очередь отправки - демон, без stop недоставленное пропадёт
+        bot.stop()
 
 
 if __name__ == '__main__':
     # настройка логирования
-    file_handler = logging.FileHandler(
-        filename=os.path.join('main.log'))
-    stdout_handler = logging.StreamHandler(sys.stdout)
-    handlers = [file_handler, stdout_handler]
-    logging.basicConfig(
-        level=logging.DEBUG,
-        handlers=handlers,
-        format='%(asctime)s, %(levelname)s, %(message)s, %(name)s'
-    )
-    ###
+    setup_logging(path=LOG_PATH,
+                  level=LOG_LEVEL,
+                  rotate_when=LOG_ROTATE_WHEN,
+                  sample_rate=LOG_SAMPLE_RATE)
     main()
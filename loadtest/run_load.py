@@ -0,0 +1,140 @@
+"""Нагрузочный прогон опроса подопечных против локальных заглушек.
+
+Запуск из корня репозитория:
+    python loadtest/run_load.py --tenants 500 --cycles 5 --error-rate 0.05
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from os.path import abspath, dirname
+
+root_dir = dirname(dirname(abspath(__file__)))
+sys.path.append(root_dir)
+
+import cohort  # noqa: E402
+import homework  # noqa: E402
+import transport  # noqa: E402
+from loadtest.stubs import (API_PATH,  # noqa: E402
+                            PracticumHandler,
+                            PracticumStub,
+                            TelegramHandler,
+                            TelegramStub,
+                            serve)
+from sender import MessageQueue  # noqa: E402
+from state import StateStore  # noqa: E402
+from tenants import TenantRegistry  # noqa: E402
+from tracker import StatusTracker  # noqa: E402
+
+# токен нужного телеграму формата, заглушка его не проверяет
+BOT_TOKEN = '123456:' + 'x' * 35
+
+
+def parse_args():
+    """параметры прогона."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenants', type=int, default=100)
+    parser.add_argument('--cycles', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='задержка API, с')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='доля ответов 500')
+    parser.add_argument('--timeout-rate', type=float, default=0.0,
+                        help='доля зависших запросов')
+    parser.add_argument('--malformed-rate', type=float, default=0.0,
+                        help='доля битого JSON')
+    parser.add_argument('--churn', type=float, default=0.2,
+                        help='вероятность смены статуса за запрос')
+    parser.add_argument('--telegram-latency', type=float, default=0.01)
+    parser.add_argument('--read-timeout', type=float, default=1.0)
+    parser.add_argument('--retries', type=int, default=0)
+    return parser.parse_args()
+
+
+def percentile(values: list, share: float) -> float:
+    """перцентиль share (от 0 до 1) по списку значений."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+def make_registry(path: str, count: int) -> TenantRegistry:
+    """реестр из count подопечных во временном JSON."""
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump([{'name': f'student{number}',
+                    'practicum_token': f'token{number}',
+                    'chat_id': str(number + 1)}
+                   for number in range(count)], file)
+    return TenantRegistry(path)
+
+
+def timed_poll_once(latencies: list):
+    """poll_once, записывающий длительность каждого цикла."""
+    poll_once = homework.poll_once
+
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return poll_once(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - started)
+    return wrapper
+
+
+def main():
+    """поднимаем заглушки, гоняем циклы опроса, печатаем итоги."""
+    args = parse_args()
+    logging.disable(logging.CRITICAL)
+    practicum = PracticumStub(latency=args.latency,
+                              error_rate=args.error_rate,
+                              timeout_rate=args.timeout_rate,
+                              malformed_rate=args.malformed_rate,
+                              churn=args.churn,
+                              hang=args.read_timeout * 3)
+    telegram_stub = TelegramStub(latency=args.telegram_latency)
+    api_server = serve(PracticumHandler, practicum)
+    bot_server = serve(TelegramHandler, telegram_stub)
+    homework.ENDPOINT = (f'http://127.0.0.1:{api_server.server_address[1]}'
+                         f'{API_PATH}')
+    transport.configure(pool_size=args.workers, retries=args.retries,
+                        read_timeout=args.read_timeout)
+    base_url = f'http://127.0.0.1:{bot_server.server_address[1]}/bot'
+    bot = MessageQueue(homework.telegram_bot(BOT_TOKEN, base_url),
+                       global_rate=10 ** 6, chat_rate=10 ** 6).start()
+    latencies = []
+    cohort.poll_once = timed_poll_once(latencies)
+    tracker = StatusTracker(StateStore(':memory:'))
+    with tempfile.TemporaryDirectory() as directory:
+        registry = make_registry(os.path.join(directory, 'tenants.json'),
+                                 args.tenants)
+        started, cpu_started = time.perf_counter(), time.process_time()
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            for _ in range(args.cycles):
+                for tenant in registry:
+                    tenant.next_poll = 0
+                cohort.poll_due(bot, registry, executor, tracker)
+        bot.join()
+        wall = time.perf_counter() - started
+        cpu = time.process_time() - cpu_started
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f'циклов опроса:        {len(latencies)}')
+    print(f'запросов к API:       {practicum.requests}')
+    print(f'сообщений в телеграм: {telegram_stub.messages}')
+    print(f'пропускная способность: {len(latencies) / wall:.1f} опросов/с')
+    print(f'p50 цикла:            {percentile(latencies, 0.5) * 1e3:.1f} мс')
+    print(f'p99 цикла:            {percentile(latencies, 0.99) * 1e3:.1f} мс')
+    print(f'CPU:                  {cpu:.2f} с ({cpu / wall:.0%} ядра)')
+    print(f'RSS (пик):            {rss:.1f} МБ')
+    api_server.shutdown()
+    bot_server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""Локальные заглушки API практикума и Bot API телеграма."""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+API_PATH = '/api/user_api/homework_statuses/'
+STATUSES = ('reviewing', 'approved', 'rejected')
+
+
+class PracticumStub:
+    """Поведение заглушки API: задержки, сбои и смена статусов."""
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0,
+                 timeout_rate: float = 0.0, malformed_rate: float = 0.0,
+                 churn: float = 0.1, homeworks: int = 5,
+                 hang: float = 30.0, seed: int = 0):
+        """доли *_rate и churn - вероятности на один запрос."""
+        self.latency = latency
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.malformed_rate = malformed_rate
+        self.churn = churn
+        self.homeworks = homeworks
+        self.hang = hang
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._accounts = {}
+        self._lock = threading.Lock()
+
+    def _account(self, token: str) -> dict:
+        account = self._accounts.get(token)
+        if account is None:
+            account = self._accounts[token] = {
+                number: {'id': number,
+                         'status': 'reviewing',
+                         'homework_name': f'{token}__hw{number}.zip',
+                         'reviewer_comment': '',
+                         'updated': 0,
+                         'lesson_name': f'Спринт {number}'}
+                for number in range(self.homeworks)}
+        return account
+
+    def answer(self, token: str, from_date: int):
+        """код ответа и тело (None - повиснуть) для запроса."""
+        with self._lock:
+            self.requests += 1
+            roll = self._random.random()
+            account = self._account(token)
+            now = int(time.time())
+            if self._random.random() < self.churn:
+                homework = account[self._random.randrange(self.homeworks)]
+                homework['status'] = self._random.choice(STATUSES)
+                homework['updated'] = now
+            changed = [dict(homework) for homework in account.values()
+                       if homework['updated'] >= from_date]
+        if roll < self.timeout_rate:
+            return 200, None
+        roll -= self.timeout_rate
+        if roll < self.error_rate:
+            return 500, b'{"error": "internal"}'
+        roll -= self.error_rate
+        if roll < self.malformed_rate:
+            return 200, b'{"homeworks": [{"status": '
+        for homework in changed:
+            homework.pop('updated')
+        body = {'homeworks': changed, 'current_date': now}
+        return 200, json.dumps(body, ensure_ascii=False).encode('utf-8')
+
+
+class PracticumHandler(BaseHTTPRequestHandler):
+    """GET /api/user_api/homework_statuses/?from_date=..."""
+
+    stub = None
+
+    def do_GET(self):
+        """ответ заглушки API практикума."""
+        url = urlparse(self.path)
+        authorization = self.headers.get('Authorization', '')
+        if url.path != API_PATH or not authorization.startswith('OAuth '):
+            self.send_error(401 if url.path == API_PATH else 404)
+            return
+        query = parse_qs(url.query)
+        from_date = int(float(query.get('from_date', ['0'])[0]))
+        time.sleep(self.stub.latency)
+        status, body = self.stub.answer(authorization[6:], from_date)
+        if body is None:
+            time.sleep(self.stub.hang)
+            return
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """запросы к заглушке не пишем в лог."""
+
+
+class TelegramStub:
+    """Счётчик сообщений, принятых заглушкой Bot API."""
+
+    def __init__(self, latency: float = 0.0):
+        """latency - задержка ответа на каждое сообщение."""
+        self.latency = latency
+        self.messages = 0
+        self._lock = threading.Lock()
+
+    def accept(self) -> int:
+        """регистрируем сообщение, возвращаем его номер."""
+        with self._lock:
+            self.messages += 1
+            return self.messages
+
+
+class TelegramHandler(BaseHTTPRequestHandler):
+    """POST /bot<token>/sendMessage в формате Bot API."""
+
+    stub = None
+
+    def do_POST(self):
+        """ответ заглушки Bot API."""
+        length = int(self.headers.get('Content-Length', 0))
+        raw = self.rfile.read(length)
+        if self.headers.get('Content-Type', '').startswith(
+                'application/json'):
+            data = json.loads(raw or b'{}')
+        else:
+            data = {key: values[0]
+                    for key, values in parse_qs(raw.decode()).items()}
+        method = self.path.rsplit('/', 1)[-1]
+        time.sleep(self.stub.latency)
+        if method == 'getMe':
+            result = {'id': 1, 'is_bot': True, 'first_name': 'stub',
+                      'username': 'stub_bot'}
+        else:
+            result = {'message_id': self.stub.accept(),
+                      'date': int(time.time()),
+                      'chat': {'id': int(data.get('chat_id', 0)),
+                               'type': 'private'},
+                      'text': data.get('text', '')}
+        body = json.dumps({'ok': True, 'result': result}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """запросы к заглушке не пишем в лог."""
+
+
+def serve(handler, stub, host: str = '127.0.0.1',
+          port: int = 0) -> ThreadingHTTPServer:
+    """поднимаем заглушку в фоновом потоке."""
+    handler_class = type(handler.__name__, (handler,), {'stub': stub})
+    server = ThreadingHTTPServer((host, port), handler_class)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
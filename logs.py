@@ -0,0 +1,76 @@
+"""Настройка логирования: запись в файл в отдельном потоке с ротацией."""
+import atexit
+import logging
+import queue
+import random
+import sys
+from logging.handlers import (QueueHandler,
+                              QueueListener,
+                              RotatingFileHandler,
+                              TimedRotatingFileHandler)
+
+FORMAT = '%(asctime)s, %(levelname)s, %(message)s, %(name)s'
+MAX_BYTES = 10 * 1024 * 1024
+BACKUP_COUNT = 5
+# extra для подробных записей, которые пишутся выборочно
+SAMPLED = {'sampled': True}
+
+
+class LazyQueueHandler(QueueHandler):
+    """Кладёт запись в очередь как есть.
+
+    Сообщение форматируется уже в потоке записи, а не в цикле опроса.
+    """
+
+    def prepare(self, record):
+        """запись не форматируется и не копируется."""
+        return record
+
+
+class SampleFilter(logging.Filter):
+    """Пропускает только долю rate записей, помеченных SAMPLED."""
+
+    def __init__(self, rate: float = 1.0):
+        """при rate=1 пишутся все записи."""
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        """решаем, писать ли запись."""
+        if not getattr(record, 'sampled', False) or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+def file_handler(path: str, rotate_when: str = None,
+                 max_bytes: int = MAX_BYTES,
+                 backup_count: int = BACKUP_COUNT) -> logging.Handler:
+    """файловый обработчик с ротацией по размеру или по времени."""
+    if rotate_when:
+        return TimedRotatingFileHandler(path, when=rotate_when,
+                                        backupCount=backup_count,
+                                        encoding='utf-8')
+    return RotatingFileHandler(path, maxBytes=max_bytes,
+                               backupCount=backup_count, encoding='utf-8')
+
+
+def setup_logging(path: str = None, level=logging.DEBUG,
+                  rotate_when: str = None, sample_rate: float = 1.0,
+                  max_bytes: int = MAX_BYTES,
+                  backup_count: int = BACKUP_COUNT) -> QueueListener:
+    """направляем логи через очередь в stdout и, если задан path, в файл."""
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if path:
+        handlers.append(
+            file_handler(path, rotate_when, max_bytes, backup_count))
+    formatter = logging.Formatter(FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    records = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(records)
+    queue_handler.addFilter(SampleFilter(sample_rate))
+    logging.basicConfig(level=level, handlers=[queue_handler], force=True)
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
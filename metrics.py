@@ -0,0 +1,227 @@
+"""Метрики бота в текстовом формате Prometheus."""
+import functools
+import inspect
+import threading
+import time
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{value}"'
+                     for name, value in zip(names, values))
+    return f'{{{pairs}}}'
+
+
+class Counter:
+    """Счётчик, растущий только вверх."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        """имена меток labels, значения передаются в inc."""
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *values, amount: float = 1):
+        """увеличиваем счётчик с метками values."""
+        with self._lock:
+            self._values[values] = self._values.get(values, 0) + amount
+
+    def value(self, *values) -> float:
+        """текущее значение счётчика."""
+        return self._values.get(values, 0)
+
+    def samples(self):
+        """строки с текущими значениями."""
+        with self._lock:
+            items = list(self._values.items())
+        for values, value in items:
+            yield f'{self.name}{_labels(self.labels, values)} {value}'
+
+
+class Gauge(Counter):
+    """Значение, которое может меняться в обе стороны."""
+
+    kind = 'gauge'
+
+    def set(self, value: float, *values):
+        """выставляем значение."""
+        with self._lock:
+            self._values[values] = value
+
+    def set_function(self, function, *values):
+        """значение вычисляется function при каждом чтении."""
+        with self._lock:
+            self._values[values] = function
+
+    def samples(self):
+        """строки с текущими значениями."""
+        with self._lock:
+            items = list(self._values.items())
+        for values, value in items:
+            if callable(value):
+                value = value()
+            yield f'{self.name}{_labels(self.labels, values)} {value}'
+
+
+class Histogram(Counter):
+    """Распределение длительностей по корзинам."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (),
+                 buckets: tuple = LATENCY_BUCKETS):
+        """верхние границы корзин buckets - в секундах."""
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *values):
+        """учитываем одно наблюдение."""
+        with self._lock:
+            counts, total, count = self._values.get(
+                values, ([0] * len(self.buckets), 0.0, 0))
+            for number, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[number] += 1
+            self._values[values] = counts, total + value, count + 1
+
+    def count(self, *values) -> int:
+        """число наблюдений."""
+        return self._values.get(values, (None, 0.0, 0))[2]
+
+    def samples(self):
+        """строки с корзинами, суммой и числом наблюдений."""
+        with self._lock:
+            items = [(values, list(counts), total, count)
+                     for values, (counts, total, count)
+                     in self._values.items()]
+        names = self.labels + ('le',)
+        for values, counts, total, count in items:
+            for bound, bucket in zip(self.buckets, counts):
+                labels = _labels(names, values + (bound,))
+                yield f'{self.name}_bucket{labels} {bucket}'
+            labels = _labels(names, values + ('+Inf',))
+            yield f'{self.name}_bucket{labels} {count}'
+            labels = _labels(self.labels, values)
+            yield f'{self.name}_sum{labels} {total}'
+            yield f'{self.name}_count{labels} {count}'
+
+
+stage_seconds = Histogram('homework_stage_seconds',
+                          'Длительность этапов цикла опроса', ('stage',))
+stage_failures = Counter('homework_stage_failures_total',
+                         'Сбои этапов цикла опроса по типу исключения',
+                         ('stage', 'exception'))
+errors = Counter('homework_errors_total',
+                 'Сбои цикла опроса по типу исключения', ('exception',))
+queue_depth = Gauge('homework_send_queue_depth',
+                    'Сообщения в очереди на отправку')
+outbox_depth = Gauge('homework_outbox_depth',
+                     'Недоставленные сообщения, ждущие повтора')
+last_success = Gauge('homework_last_success_timestamp_seconds',
+                     'Время последнего успешного цикла опроса')
+last_success_age = Gauge('homework_last_success_age_seconds',
+                         'Сколько секунд назад был успешный цикл опроса')
+hedged_requests = Counter('homework_hedged_requests_total',
+                          'Запросы к API, продублированные из-за задержки')
+
+METRICS = [stage_seconds, stage_failures, errors, queue_depth, outbox_depth,
+           last_success, last_success_age, hedged_requests]
+
+_last_success = None
+last_success_age.set_function(
+    lambda: -1 if _last_success is None else time.time() - _last_success)
+
+
+def timed(stage: str):
+    """декоратор: длительность и сбои функции как этапа stage.
+
+    Подходит и для обычных функций, и для корутин.
+    """
+    def decorator(function):
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await function(*args, **kwargs)
+                except Exception as error:
+                    stage_failures.inc(stage, type(error).__name__)
+                    raise
+                finally:
+                    stage_seconds.observe(
+                        time.perf_counter() - started, stage)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            except Exception as error:
+                stage_failures.inc(stage, type(error).__name__)
+                raise
+            finally:
+                stage_seconds.observe(time.perf_counter() - started, stage)
+        return wrapper
+    return decorator
+
+
+def mark_success():
+    """отмечаем успешный цикл опроса."""
+    global _last_success
+    _last_success = time.time()
+    last_success.set(_last_success)
+
+
+def render() -> str:
+    """все метрики в текстовом формате Prometheus."""
+    lines = []
+    for metric in METRICS:
+        lines.append(f'# HELP {metric.name} {metric.help_text}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(metric.samples())
+    return '\n'.join(lines) + '\n'
+
+
+def handler_class():
+    """обработчик GET /metrics, http.server нужен только серверу метрик."""
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        """Отдаёт метрики по GET /metrics."""
+
+        def do_GET(self):
+            """ответ со всеми метриками."""
+            if self.path.split('?')[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            body = render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            """запросы к метрикам не пишем в лог."""
+
+    return MetricsHandler
+
+
+def serve(port: int, host: str = '127.0.0.1'):
+    """запускаем HTTP-сервер метрик в фоновом потоке."""
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer((host, port), handler_class())
+    thread = threading.Thread(target=server.serve_forever,
+                              name='metrics', daemon=True)
+    thread.start()
+    return server
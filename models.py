@@ -0,0 +1,51 @@
+"""Записи домашек из ответа API."""
+import sys
+from enum import Enum
+from typing import NamedTuple
+
+
+class Verdict(str, Enum):
+    """Статусы проверки домашки, ключи HOMEWORK_VERDICTS."""
+
+    APPROVED = 'approved'
+    REVIEWING = 'reviewing'
+    REJECTED = 'rejected'
+
+
+VERDICTS = {verdict.value: verdict for verdict in Verdict}
+
+
+def intern_status(status: str):
+    """общий объект статуса: Verdict или интернированная строка."""
+    verdict = VERDICTS.get(status)
+    if verdict is not None:
+        return verdict
+    return sys.intern(status) if isinstance(status, str) else status
+
+
+class Homework(NamedTuple):
+    """Проверенная неизменяемая запись одной домашки."""
+
+    id: object
+    name: str
+    status: Verdict
+
+    @classmethod
+    def from_dict(cls, homework: dict) -> 'Homework':
+        """собираем запись из словаря ответа, проверяя ключи."""
+        homework_status = homework.get('status')
+        homework_name = homework.get('homework_name')
+        if homework_name is None:
+            raise KeyError(f"ключа 'homework_name' нет в {homework}"
+                           f"или вернулось None")
+        verdict = VERDICTS.get(homework_status)
+        if verdict is None:
+            raise ValueError(f"статуса {homework_status} нет в "
+                             f"HOMEWORK_VERDICTS"
+                             f"или вернулось None")
+        return cls(homework.get('id'), homework_name, verdict)
+
+    @property
+    def key(self) -> str:
+        """ключ домашки: id, а если его нет - название."""
+        return str(self.name if self.id is None else self.id)
@@ -0,0 +1,189 @@
+"""Исходящие сообщения, которые телеграм не принял, в базе SQLite.
+
+Сообщения копятся в памяти и пишутся в базу пачкой раз в
+commit_interval одной транзакцией. Фоновый поток повторяет доставку по
+порядку в каждом чате: пока первое сообщение чата не ушло, остальные
+ждут, пауза между попытками растёт вдвое до max_delay. Сообщения,
+которые телеграм отверг (BadRequest, Unauthorized), не повторяются.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id TEXT NOT NULL,
+    text TEXT NOT NULL,
+    options TEXT NOT NULL,
+    created REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0
+)
+"""
+COMMIT_INTERVAL = 0.05
+RETRY_DELAY = 5
+MAX_DELAY = 3600
+# после стольких попыток сообщение выбрасывается
+MAX_ATTEMPTS = 100
+IDLE_WAIT = 5
+
+logger = logging.getLogger(__name__)
+
+
+class Outbox:
+    """Очередь недоставленных сообщений, переживающая перезапуск."""
+
+    def __init__(self, path: str, commit_interval: float = COMMIT_INTERVAL,
+                 retry_delay: float = RETRY_DELAY,
+                 max_delay: float = MAX_DELAY,
+                 max_attempts: int = MAX_ATTEMPTS):
+        """сообщения хранятся в базе path."""
+        self.commit_interval = commit_interval
+        self.retry_delay = retry_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(SCHEMA)
+        self._chats = Counter(chat_id for chat_id, in self._connection.execute(
+            'SELECT chat_id FROM outbox'))
+        self._batch = []
+        self._next_due = 0.0
+        self._condition = threading.Condition()
+        self._send = None
+        self._thread = None
+        self._stopped = False
+
+    def start(self, send):
+        """запускаем повторы, send(chat_id, text, options) - одна попытка."""
+        self._send = send
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='outbox',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """останавливаем повторы, недоставленное остаётся в базе."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.commit()
+
+    @property
+    def depth(self) -> int:
+        """сколько сообщений ждёт повторной доставки."""
+        with self._condition:
+            return sum(self._chats.values())
+
+    def has_pending(self, chat_id) -> bool:
+        """есть ли у чата недоставленные сообщения."""
+        with self._condition:
+            return self._chats[str(chat_id)] > 0
+
+    def add(self, chat_id, text: str, options: dict = None):
+        """откладываем сообщение, в базу оно попадёт со следующей пачкой."""
+        with self._condition:
+            self._batch.append((str(chat_id), text, json.dumps(options or {}),
+                                time.time()))
+            self._chats[str(chat_id)] += 1
+            self._condition.notify()
+
+    def commit(self):
+        """пишем накопленные сообщения одной транзакцией."""
+        with self._condition:
+            batch, self._batch = self._batch, []
+        if batch:
+            with self._connection:
+                self._connection.executemany(
+                    'INSERT INTO outbox (chat_id, text, options, created) '
+                    'VALUES (?, ?, ?, ?)', batch)
+
+    def _delay(self, attempts: int) -> float:
+        return min(self.retry_delay * 2 ** (attempts - 1), self.max_delay)
+
+    def _forget(self, message_id: int, chat_id: str):
+        with self._connection:
+            self._connection.execute('DELETE FROM outbox WHERE id = ?',
+                                     (message_id,))
+        with self._condition:
+            self._chats[chat_id] -= 1
+            if self._chats[chat_id] <= 0:
+                del self._chats[chat_id]
+
+    def _failed(self, message_id: int, chat_id: str, attempts: int,
+                error: Exception, now: float, delay: float):
+        if attempts >= self.max_attempts:
+            logger.error('сообщение в чат %s не доставлено за %s попыток, '
+                         'выброшено: %s', chat_id, attempts, error)
+            self._forget(message_id, chat_id)
+            return
+        logger.warning('повтор доставки в чат %s не удался: %s',
+                       chat_id, error)
+        with self._connection:
+            self._connection.execute(
+                'UPDATE outbox SET attempts = ?, next_attempt = ? '
+                'WHERE id = ?',
+                (attempts, now + delay, message_id))
+
+    def deliver_due(self, now: float = None):
+        """повторяем доставку: по одному чату - строго по порядку.
+
+        Сообщение, которое телеграм отверг, не повторяем, а на RetryAfter
+        ждём столько, сколько он просит.
+        """
+        from telegram.error import BadRequest, RetryAfter, Unauthorized
+
+        now = time.time() if now is None else now
+        rows = self._connection.execute(
+            'SELECT id, chat_id, text, options, attempts, next_attempt '
+            'FROM outbox ORDER BY id').fetchall()
+        blocked = set()
+        next_due = now + IDLE_WAIT
+        for message_id, chat_id, text, options, attempts, due in rows:
+            if chat_id in blocked:
+                continue
+            if due > now:
+                blocked.add(chat_id)
+                next_due = min(next_due, due)
+                continue
+            try:
+                self._send(chat_id, text, json.loads(options))
+            except (BadRequest, Unauthorized) as error:
+                logger.error('телеграм отверг сообщение в чат %s, '
+                             'выброшено: %s', chat_id, error)
+                self._forget(message_id, chat_id)
+            except Exception as error:
+                blocked.add(chat_id)
+                if isinstance(error, RetryAfter):
+                    delay = error.retry_after
+                else:
+                    delay = self._delay(attempts + 1)
+                self._failed(message_id, chat_id, attempts + 1, error, now,
+                             delay)
+                next_due = min(next_due, now + delay)
+            else:
+                self._forget(message_id, chat_id)
+        self._next_due = next_due
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._batch and not self._stopped:
+                    self._condition.wait(
+                        max(min(self._next_due - time.time(), IDLE_WAIT), 0))
+                stopped = self._stopped
+                collecting = bool(self._batch)
+            if stopped:
+                return
+            if collecting:
+                # ждём, пока в пачку попадут соседние сообщения
+                time.sleep(self.commit_interval)
+            self.commit()
+            self.deliver_due()
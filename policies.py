@@ -0,0 +1,179 @@
+"""Что делать после сбоя: таблица политик повторов и предохранители.
+
+Политика ищется по классу исключения вверх по его MRO, для
+ResponseCodeError сначала по паре (класс, HTTP-код). Действия:
+RETRY - сразу повторить запрос в этом же цикле, BACKOFF - ждать
+следующего цикла по растущей паузе, FATAL - повторять бессмысленно.
+Сбои с breaker копят отказы предохранителя API или подопечного: пока
+он разомкнут, запросы не делаются вовсе.
+"""
+import logging
+import threading
+import time
+from http import HTTPStatus
+from typing import NamedTuple
+
+from exception import (ApiResponseError,
+                       CircuitOpenError,
+                       RateLimitedError,
+                       ResponseCodeError,
+                       ResponseContentError,
+                       ResponseContentTypeError)
+
+RETRY = 'retry'
+BACKOFF = 'backoff'
+FATAL = 'fatal'
+
+ENDPOINT = 'endpoint'
+TENANT = 'tenant'
+
+# подряд отказов до размыкания и пауза до пробного запроса
+BREAKER_THRESHOLD = 5
+BREAKER_RESET = 60
+# первая пауза немедленного повтора, дальше удваивается
+RETRY_PAUSE = 0.5
+
+logger = logging.getLogger(__name__)
+
+
+class Policy(NamedTuple):
+    """Поведение после сбоя одного вида."""
+
+    action: str
+    # немедленных повторов в том же цикле
+    retries: int = 0
+    # первая пауза до следующего цикла, дальше удваивается до max_interval
+    interval: float = 30
+    max_interval: float = 3600
+    # чей предохранитель считает отказ: ENDPOINT, TENANT или никакой
+    breaker: str = None
+
+    def pause(self, attempt: int) -> float:
+        """пауза перед немедленным повтором номер attempt."""
+        return RETRY_PAUSE * 2 ** attempt
+
+
+TRANSIENT = Policy(RETRY, retries=1, interval=5, max_interval=300,
+                   breaker=ENDPOINT)
+
+POLICIES = {
+    (ResponseCodeError, HTTPStatus.UNAUTHORIZED): Policy(FATAL),
+    (ResponseCodeError, HTTPStatus.FORBIDDEN): Policy(FATAL),
+    (ResponseCodeError, HTTPStatus.NOT_FOUND): Policy(
+        BACKOFF, interval=300, breaker=ENDPOINT),
+    (ResponseCodeError, HTTPStatus.INTERNAL_SERVER_ERROR): TRANSIENT,
+    (ResponseCodeError, HTTPStatus.BAD_GATEWAY): TRANSIENT,
+    (ResponseCodeError, HTTPStatus.SERVICE_UNAVAILABLE): TRANSIENT,
+    (ResponseCodeError, HTTPStatus.GATEWAY_TIMEOUT): TRANSIENT,
+    ResponseCodeError: Policy(BACKOFF, interval=60),
+    # сеть и битый JSON
+    ApiResponseError: TRANSIENT,
+    RateLimitedError: Policy(BACKOFF, interval=60, max_interval=600),
+    CircuitOpenError: Policy(BACKOFF, interval=BREAKER_RESET,
+                             max_interval=BREAKER_RESET),
+    ResponseContentError: Policy(BACKOFF, interval=60, breaker=TENANT),
+    ResponseContentTypeError: Policy(BACKOFF, interval=60, breaker=TENANT),
+    Exception: Policy(BACKOFF),
+}
+
+
+def policy_for(error: BaseException) -> Policy:
+    """политика для исключения по таблице POLICIES."""
+    status = getattr(error, 'status_code', None)
+    for error_class in type(error).__mro__:
+        policy = POLICIES.get((error_class, status))
+        if policy is None:
+            policy = POLICIES.get(error_class)
+        if policy is not None:
+            return policy
+    return POLICIES[Exception]
+
+
+class CircuitBreaker:
+    """Размыкается после threshold отказов подряд.
+
+    Через reset секунд пропускает один пробный запрос: успех замыкает
+    предохранитель, отказ снова размыкает на reset секунд.
+    """
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD,
+                 reset: float = BREAKER_RESET):
+        """отказы считаются подряд, успех их обнуляет."""
+        self.threshold = threshold
+        self.reset = reset
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self, now: float = None) -> bool:
+        """можно ли делать запрос."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if now - self.opened_at < self.reset:
+                return False
+            # пробный запрос, остальные ждут ещё reset секунд
+            self.opened_at = now
+            return True
+
+    def success(self):
+        """успешный запрос замыкает предохранитель."""
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def failure(self, now: float = None) -> bool:
+        """отказ, возвращаем True, если предохранитель разомкнулся."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self.failures += 1
+            if self.failures < self.threshold:
+                return False
+            opened = self.opened_at is None
+            self.opened_at = now
+            return opened
+
+
+class Circuits:
+    """Предохранители API и подопечных по именам."""
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD,
+                 reset: float = BREAKER_RESET):
+        """предохранители создаются при первом обращении."""
+        self.threshold = threshold
+        self.reset = reset
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, scope: str, name: str) -> CircuitBreaker:
+        """предохранитель scope (ENDPOINT или TENANT) с именем name."""
+        key = (scope, name)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(
+                    key, CircuitBreaker(self.threshold, self.reset))
+        return breaker
+
+    def check(self, endpoint: str, tenant: str):
+        """CircuitOpenError, если запрос сейчас делать нельзя."""
+        for scope, name in ((ENDPOINT, endpoint), (TENANT, tenant)):
+            if not self.get(scope, name).allow():
+                raise CircuitOpenError(
+                    f'предохранитель {scope} {name} разомкнут, '
+                    f'запрос пропущен')
+
+    def success(self, endpoint: str, tenant: str):
+        """цикл прошёл: замыкаем оба предохранителя."""
+        self.get(ENDPOINT, endpoint).success()
+        self.get(TENANT, tenant).success()
+
+    def failure(self, policy: Policy, endpoint: str, tenant: str):
+        """считаем отказ предохранителю из политики."""
+        if policy.breaker is None:
+            return
+        name = endpoint if policy.breaker == ENDPOINT else tenant
+        if self.get(policy.breaker, name).failure():
+            logger.warning('Предохранитель %s %s разомкнут на %s с',
+                           policy.breaker, name, self.reset)
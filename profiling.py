@@ -0,0 +1,142 @@
+"""Профилирование работающего бота по сигналу.
+
+SIGUSR1 - cProfile на следующие PROFILE_CYCLES циклов опроса,
+SIGUSR2 - разница снимков tracemalloc за столько же циклов.
+Обработчик сигнала только ставит флаг, вся работа идёт на границе
+цикла в tick(), а cProfile и tracemalloc импортируются по запросу,
+поэтому без запроса профилирование ничего не стоит.
+
+    kill -USR1 <pid>
+"""
+import logging
+import os
+import signal
+import time
+
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+PROFILE_CYCLES = int(os.getenv('PROFILE_CYCLES', 10))
+PROFILE_TOP = int(os.getenv('PROFILE_TOP', 25))
+TRACEMALLOC_FRAMES = 10
+
+logger = logging.getLogger(__name__)
+
+
+class Profiler:
+    """cProfile и tracemalloc вокруг нескольких циклов опроса.
+
+    cProfile видит только поток, который вызывает tick(): в homework.py
+    и в асинхронном cohort.py это весь цикл опроса, в cohort.py с пулом
+    потоков - только раздача работы пулу.
+    """
+
+    def __init__(self, directory: str = PROFILE_DIR,
+                 cycles: int = PROFILE_CYCLES, top: int = PROFILE_TOP):
+        """отчёты пишутся в directory, в лог - top строк."""
+        self.directory = directory
+        self.cycles = cycles
+        self.top = top
+        self.cpu_requested = False
+        self.memory_requested = False
+        self._cpu = None
+        self._cpu_left = 0
+        self._snapshot = None
+        self._memory_left = 0
+        self._stop_tracing = False
+
+    def request_cpu(self, *args):
+        """запрос cProfile, годится как обработчик сигнала."""
+        self.cpu_requested = True
+
+    def request_memory(self, *args):
+        """запрос снимков памяти, годится как обработчик сигнала."""
+        self.memory_requested = True
+
+    def tick(self):
+        """граница цикла опроса: запускаем и завершаем замеры."""
+        if self.cpu_requested or self._cpu is not None:
+            self._tick_cpu()
+        if self.memory_requested or self._snapshot is not None:
+            self._tick_memory()
+
+    def _path(self, kind: str, suffix: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        name = f'{kind}-{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}'
+        return os.path.join(self.directory, f'{name}.{suffix}')
+
+    def _tick_cpu(self):
+        import cProfile
+        import io
+        import pstats
+
+        if self._cpu is None:
+            self.cpu_requested = False
+            self._cpu = cProfile.Profile()
+            self._cpu_left = self.cycles
+            self._cpu.enable()
+            logger.info('cProfile включён на %s циклов', self.cycles)
+            return
+        self._cpu_left -= 1
+        if self._cpu_left > 0:
+            return
+        self._cpu.disable()
+        path = self._path('cpu', 'prof')
+        self._cpu.dump_stats(path)
+        report = io.StringIO()
+        pstats.Stats(self._cpu, stream=report).sort_stats(
+            'cumulative').print_stats(self.top)
+        self._cpu = None
+        self.cpu_requested = False
+        logger.info('Профиль CPU записан в %s\n%s', path, report.getvalue())
+
+    def _take_snapshot(self):
+        import tracemalloc
+
+        return tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),))
+
+    def _tick_memory(self):
+        import tracemalloc
+
+        if self._snapshot is None:
+            self.memory_requested = False
+            self._stop_tracing = not tracemalloc.is_tracing()
+            if self._stop_tracing:
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._snapshot = self._take_snapshot()
+            self._memory_left = self.cycles
+            logger.info('tracemalloc включён на %s циклов', self.cycles)
+            return
+        self._memory_left -= 1
+        if self._memory_left > 0:
+            return
+        snapshot = self._take_snapshot()
+        diff = snapshot.compare_to(self._snapshot, 'lineno')[:self.top]
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stop_tracing:
+            tracemalloc.stop()
+        self._snapshot = None
+        self.memory_requested = False
+        lines = [f'сейчас {current / 1024:.1f} КиБ, '
+                 f'пик {peak / 1024:.1f} КиБ']
+        lines.extend(str(stat) for stat in diff)
+        report = '\n'.join(lines)
+        path = self._path('memory', 'txt')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(report + '\n')
+        logger.info('Разница снимков памяти записана в %s\n%s', path, report)
+
+
+profiler = Profiler()
+
+
+def install(target: Profiler = profiler):
+    """вешаем запросы профилирования на SIGUSR1 и SIGUSR2.
+
+    Вызывать из главного потока, на системах без этих сигналов
+    ничего не делает.
+    """
+    for name, handler in (('SIGUSR1', target.request_cpu),
+                          ('SIGUSR2', target.request_memory)):
+        signum = getattr(signal, name, None)
+        if signum is not None:
+            signal.signal(signum, handler)
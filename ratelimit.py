@@ -0,0 +1,204 @@
+"""Ограничение частоты запросов: token bucket."""
+import hashlib
+import sqlite3
+import threading
+import time
+
+SHARED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    blocked_until REAL NOT NULL DEFAULT 0
+)
+"""
+# пауза после 429, если сервер не прислал Retry-After
+DEFAULT_RETRY_AFTER = 60
+
+
+class TokenBucket:
+    """Не больше rate операций в секунду, всплеск до capacity."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        """по умолчанию capacity - секунда работы на полной скорости."""
+        self.rate = rate
+        self.capacity = max(capacity or rate, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens: float = 1) -> float:
+        """списываем токены, возвращаем сколько ждать до их появления."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1):
+        """ждём, пока в ведре появятся токены."""
+        delay = self.reserve(tokens)
+        if delay:
+            time.sleep(delay)
+
+
+def retry_after(value, default: float = DEFAULT_RETRY_AFTER,
+                now: float = None) -> float:
+    """секунды из заголовка Retry-After: числом или HTTP-датой."""
+    if not value:
+        return default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+
+    try:
+        moment = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return default
+    now = time.time() if now is None else now
+    return max(moment - now, 0.0)
+
+
+class SharedTokenBucket:
+    """Token bucket в базе SQLite, общий для всех процессов.
+
+    Состояние ведра меняется в одной транзакции BEGIN IMMEDIATE, поэтому
+    процессы не списывают одни и те же токены. Время - time.time(), оно
+    общее у процессов на одной машине.
+    """
+
+    def __init__(self, path: str, rate: float, capacity: float = None):
+        """все ведра лежат в базе path, у каждого своё имя."""
+        self.rate = rate
+        self.capacity = max(capacity or rate, 1)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._connection.execute(SHARED_SCHEMA)
+
+    def _update(self, name: str, change, now: float = None) -> float:
+        now = time.time() if now is None else now
+        with self._lock:
+            connection = self._connection
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                row = connection.execute(
+                    'SELECT tokens, updated, blocked_until FROM buckets '
+                    'WHERE name = ?', (name,)).fetchone()
+                tokens, updated, blocked_until = row or (
+                    self.capacity, now, 0.0)
+                tokens = min(self.capacity,
+                             tokens + max(now - updated, 0) * self.rate)
+                tokens, blocked_until, delay = change(
+                    tokens, blocked_until, now)
+                connection.execute(
+                    'INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?)',
+                    (name, tokens, now, blocked_until))
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+        return delay
+
+    def reserve(self, name: str, tokens: float = 1, now: float = None,
+                max_delay: float = None) -> float:
+        """списываем токены ведра name, возвращаем сколько ждать.
+
+        Если ждать дольше max_delay, токены не списываются: отказ
+        от запроса не должен загонять ведро в долг.
+        """
+        def change(available, blocked_until, now):
+            left = available - tokens
+            delay = max(-left / self.rate if left < 0 else 0.0,
+                        blocked_until - now)
+            if max_delay is not None and delay > max_delay:
+                return available, blocked_until, delay
+            return left, blocked_until, delay
+        return self._update(name, change, now)
+
+    def release(self, name: str, tokens: float = 1, now: float = None):
+        """возвращаем в ведро name токены, которые не пригодились."""
+        def change(available, blocked_until, now):
+            return min(self.capacity, available + tokens), blocked_until, 0.0
+        self._update(name, change, now)
+
+    def block(self, name: str, seconds: float, now: float = None):
+        """не выдаём токены ведра name ближайшие seconds секунд."""
+        def change(available, blocked_until, now):
+            return available, max(blocked_until, now + seconds), 0.0
+        self._update(name, change, now)
+
+    def close(self):
+        """закрываем соединение с базой."""
+        self._connection.close()
+
+
+class QuotaLimiter:
+    """Общая квота запросов к API и отдельная квота на каждый токен.
+
+    rate=0 выключает соответствующее ограничение.
+    """
+
+    GLOBAL = 'global'
+
+    def __init__(self, path: str, rate: float = 0, token_rate: float = 0):
+        """ведра обоих уровней хранятся в базе SQLite path."""
+        self.global_bucket = SharedTokenBucket(path, rate) if rate else None
+        self.token_bucket = (SharedTokenBucket(path, token_rate)
+                             if token_rate else None)
+
+    @staticmethod
+    def token_key(token: str) -> str:
+        """имя ведра токена: сам токен в базу не пишем."""
+        return 'token:' + hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def _buckets(self, token: str) -> list:
+        buckets = []
+        if self.global_bucket is not None:
+            buckets.append((self.global_bucket, self.GLOBAL))
+        if self.token_bucket is not None:
+            buckets.append((self.token_bucket, self.token_key(token)))
+        return buckets
+
+    def reserve(self, token: str, now: float = None,
+                max_delay: float = None) -> float:
+        """берём по токену из общей квоты и квоты токена.
+
+        Если хоть одну квоту ждать дольше max_delay, не берём ни одной
+        и возвращаем это ожидание.
+        """
+        delay = 0.0
+        taken = []
+        for bucket, name in self._buckets(token):
+            wait = bucket.reserve(name, now=now, max_delay=max_delay)
+            if max_delay is not None and wait > max_delay:
+                for taken_bucket, taken_name in taken:
+                    taken_bucket.release(taken_name, now=now)
+                return wait
+            taken.append((bucket, name))
+            delay = max(delay, wait)
+        return delay
+
+    def block(self, token: str, seconds: float, now: float = None):
+        """сервер ответил 429: ждём seconds перед запросами с токеном.
+
+        Без квоты на токены пауза ложится на общую квоту.
+        """
+        if self.token_bucket is not None:
+            self.token_bucket.block(self.token_key(token), seconds, now)
+        elif self.global_bucket is not None:
+            self.global_bucket.block(self.GLOBAL, seconds, now)
+
+    def close(self):
+        """закрываем соединения с базой."""
+        for bucket in (self.global_bucket, self.token_bucket):
+            if bucket is not None:
+                bucket.close()
@@ -0,0 +1,63 @@
+"""Адаптивный интервал опроса вместо постоянного RETRY_TIME."""
+import random
+
+INTERVAL = 600
+# работа на ревью - статус скоро поменяется, опрашиваем чаще
+REVIEWING_INTERVAL = 120
+# без изменений интервал растёт до потолка
+MAX_INTERVAL = 3600
+IDLE_FACTOR = 1.5
+# первая пауза после ошибки, дальше удваивается до MAX_INTERVAL
+ERROR_INTERVAL = 30
+JITTER = 0.5
+
+
+class PollSchedule:
+    """Пауза до следующего опроса по итогам предыдущих циклов."""
+
+    def __init__(self, interval: float = INTERVAL,
+                 reviewing_interval: float = REVIEWING_INTERVAL,
+                 max_interval: float = MAX_INTERVAL,
+                 idle_factor: float = IDLE_FACTOR,
+                 error_interval: float = ERROR_INTERVAL,
+                 jitter: float = JITTER):
+        """базовая пауза interval - после изменения статуса."""
+        self.interval = interval
+        self.reviewing_interval = reviewing_interval
+        self.max_interval = max(max_interval, interval)
+        self.idle_factor = idle_factor
+        self.error_interval = error_interval
+        self.jitter = jitter
+        self.delay = interval
+        self.idle_cycles = 0
+        self.errors = 0
+
+    def _jittered(self, delay: float) -> float:
+        return delay * random.uniform(1 - self.jitter, 1)
+
+    def success(self, changed: bool, reviewing: bool) -> float:
+        """успешный цикл: changed - были новые статусы."""
+        self.errors = 0
+        self.idle_cycles = 0 if changed else self.idle_cycles + 1
+        if reviewing:
+            self.delay = min(self.reviewing_interval, self.interval)
+        else:
+            self.delay = min(
+                self.interval * self.idle_factor ** self.idle_cycles,
+                self.max_interval)
+        return self.delay
+
+    def error(self, interval: float = None,
+              max_interval: float = None, minimum: float = 0) -> float:
+        """сбой цикла: экспоненциальная пауза со случайным разбросом.
+
+        interval и max_interval задают кривую для сбоя этого вида,
+        minimum - пауза, которую попросил сервер, разброс её не сокращает.
+        """
+        self.errors += 1
+        interval = self.error_interval if interval is None else interval
+        if max_interval is None:
+            max_interval = self.max_interval
+        delay = min(interval * 2 ** (self.errors - 1), max_interval)
+        self.delay = max(self._jittered(delay), minimum)
+        return self.delay
@@ -0,0 +1,314 @@
+"""Очередь исходящих сообщений телеграма с ограничением частоты."""
+import logging
+import queue
+import sys
+import threading
+import time
+import zlib
+
+import metrics
+from ratelimit import TokenBucket
+
+# лимиты Bot API: около 30 сообщений в секунду и 1 в секунду на чат
+GLOBAL_RATE = 30
+CHAT_RATE = 1
+CHAT_BURST = 3
+WORKERS = 4
+# предел длины сообщения Bot API
+MESSAGE_LIMIT = 4096
+DIGEST_MAX_ITEMS = 20
+SEND_ATTEMPTS = 5
+RETRY_DELAY = 1
+
+logger = logging.getLogger(__name__)
+
+
+def recipients(chat_id) -> tuple:
+    """чаты подписчиков: список, строка через запятую или один чат.
+
+    Первый чат - владелец, ему же идут уведомления о сбоях.
+    """
+    if isinstance(chat_id, (list, tuple)):
+        return tuple(chat_id)
+    if isinstance(chat_id, str) and ',' in chat_id:
+        return tuple(chat.strip() for chat in chat_id.split(',')
+                     if chat.strip())
+    return (chat_id,)
+
+
+def is_telegram_error(error: Exception) -> bool:
+    """ошибка телеграма, не импортируя telegram в потоке опроса.
+
+    Пока telegram не загружен, его ошибок быть не может.
+    """
+    module = sys.modules.get('telegram.error')
+    telegram_error = getattr(module, 'TelegramError', None)
+    return telegram_error is not None and isinstance(error, telegram_error)
+
+
+class LazyBot:
+    """Бот, который создаётся factory при первой отправке.
+
+    Импорт telegram и сборка бота не задерживают запуск цикла опроса.
+    """
+
+    def __init__(self, factory):
+        """factory() возвращает настоящий бот."""
+        self.factory = factory
+        self._bot = None
+        self._lock = threading.Lock()
+
+    @property
+    def bot(self):
+        """настоящий бот, создаётся один раз."""
+        if self._bot is None:
+            with self._lock:
+                if self._bot is None:
+                    self._bot = self.factory()
+        return self._bot
+
+    def send_message(self, *args, **kwargs):
+        """отправка через настоящий бот."""
+        return self.bot.send_message(*args, **kwargs)
+
+
+class MessageQueue:
+    """Бот, который ставит сообщения в очередь вместо отправки.
+
+    Сообщения одного чата обслуживает один поток, поэтому порядок
+    в чате сохраняется. С outbox сообщение после первой сетевой ошибки
+    уходит в базу ждать повтора, и пока у чата есть такие, новые встают
+    за ними.
+    """
+
+    def __init__(self, bot, workers: int = WORKERS,
+                 global_rate: float = GLOBAL_RATE,
+                 chat_rate: float = CHAT_RATE,
+                 chat_burst: float = CHAT_BURST, outbox=None):
+        """отправка идёт через настоящий telegram.Bot из bot."""
+        self.bot = bot
+        self.outbox = outbox
+        self.global_bucket = TokenBucket(global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self._chat_buckets = {}
+        self._queues = [queue.Queue() for _ in range(max(workers, 1))]
+        self._threads = []
+
+    def start(self):
+        """запускаем потоки отправки."""
+        for number, messages in enumerate(self._queues):
+            thread = threading.Thread(target=self._work, args=(messages,),
+                                      name=f'sender-{number}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if self.outbox is not None:
+            self.outbox.start(self._send_once)
+        return self
+
+    def stop(self):
+        """дожидаемся отправки очереди и останавливаем потоки."""
+        for messages in self._queues:
+            messages.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self.outbox is not None:
+            self.outbox.stop()
+
+    def join(self):
+        """ждём, пока очередь опустеет."""
+        for messages in self._queues:
+            messages.join()
+
+    @property
+    def depth(self) -> int:
+        """сколько сообщений ждёт отправки."""
+        return sum(messages.qsize() for messages in self._queues)
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        """ставим сообщение в очередь его чата."""
+        shard = zlib.crc32(str(chat_id).encode()) % len(self._queues)
+        self._queues[shard].put((chat_id, text, kwargs))
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets.setdefault(
+                chat_id, TokenBucket(self.chat_rate, self.chat_burst))
+        return bucket
+
+    def _work(self, messages: queue.Queue):
+        while True:
+            item = messages.get()
+            try:
+                if item is None:
+                    return
+                self._deliver(*item)
+            finally:
+                messages.task_done()
+
+    def _send_once(self, chat_id, text: str, kwargs: dict):
+        """одна попытка отправки с учётом лимитов, для повторов outbox."""
+        self._chat_bucket(chat_id).acquire()
+        self.global_bucket.acquire()
+        self.bot.send_message(chat_id=chat_id, text=text, **kwargs)
+
+    @metrics.timed('deliver')
+    def _deliver(self, chat_id, text: str, kwargs: dict):
+        from telegram.error import (BadRequest,
+                                    NetworkError,
+                                    RetryAfter,
+                                    TelegramError,
+                                    Unauthorized)
+
+        if self.outbox is not None and self.outbox.has_pending(chat_id):
+            self.outbox.add(chat_id, text, kwargs)
+            return
+        for attempt in range(1, SEND_ATTEMPTS + 1):
+            self._chat_bucket(chat_id).acquire()
+            self.global_bucket.acquire()
+            try:
+                self.bot.send_message(chat_id=chat_id, text=text, **kwargs)
+            except RetryAfter as error:
+                logger.warning('Флуд-контроль телеграма, ждём %s с',
+                               error.retry_after)
+                time.sleep(error.retry_after)
+            except (BadRequest, Unauthorized) as error:
+                # в ptb BadRequest - подкласс NetworkError, но повтор
+                # не поможет: чат не найден, бот заблокирован и т.п.
+                logger.error('телеграм отклонил сообщение в чат %s: '
+                             '"%s": %s', chat_id, text, error)
+                return
+            except NetworkError as error:
+                logger.warning('Сетевая ошибка телеграма: %s, попытка %s',
+                               error, attempt)
+                # с outbox повторы с паузами идут там, а не в этом потоке
+                if self.outbox is not None or attempt == SEND_ATTEMPTS:
+                    break
+                time.sleep(RETRY_DELAY * 2 ** (attempt - 1))
+            except TelegramError as error:
+                logger.error('не удалось отправить сообщение: "%s": %s',
+                             text, error)
+                return
+            else:
+                logger.info('сообщение доставлено в чат %s', chat_id)
+                return
+        if self.outbox is not None:
+            logger.warning('сообщение в чат %s отложено для повтора',
+                           chat_id)
+            self.outbox.add(chat_id, text, kwargs)
+            return
+        logger.error('не удалось отправить сообщение: "%s" за %s попыток',
+                     text, SEND_ATTEMPTS)
+
+
+class DigestBot:
+    """Бот, который копит сообщения чата и шлёт их одним.
+
+    Сводка уходит через window секунд после первого сообщения, сразу
+    при max_items сообщениях или когда следующее не влезает в limit
+    символов. Каждое сообщение - отдельная строка сводки.
+    """
+
+    def __init__(self, bot, window: float,
+                 max_items: int = DIGEST_MAX_ITEMS,
+                 limit: int = MESSAGE_LIMIT):
+        """сводки отправляются через bot, обычно MessageQueue."""
+        self.bot = bot
+        self.window = window
+        self.max_items = max_items
+        self.limit = limit
+        self._pending = {}
+        self._deadlines = {}
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def start(self):
+        """запускаем поток, отправляющий сводки по таймеру."""
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='digest',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """отправляем всё накопленное и останавливаем поток."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        if hasattr(self.bot, 'stop'):
+            self.bot.stop()
+
+    def join(self):
+        """отправляем накопленное и ждём очередь отправки."""
+        self.flush()
+        if hasattr(self.bot, 'join'):
+            self.bot.join()
+
+    @property
+    def depth(self) -> int:
+        """сколько сообщений ждёт сводки и отправки."""
+        with self._condition:
+            pending = sum(len(lines) for lines in self._pending.values())
+        return pending + getattr(self.bot, 'depth', 0)
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        """добавляем сообщение в сводку чата."""
+        with self._condition:
+            if kwargs:
+                # сообщения с разметкой и прочими параметрами не склеиваем
+                self._send(chat_id)
+                self.bot.send_message(chat_id=chat_id, text=text, **kwargs)
+                return
+            for line in self._split(text):
+                lines = self._pending.get(chat_id)
+                if lines and self._size(lines) + 1 + len(line) > self.limit:
+                    self._send(chat_id)
+                    lines = None
+                if not lines:
+                    lines = self._pending[chat_id] = []
+                    self._deadlines[chat_id] = time.monotonic() + self.window
+                    self._condition.notify()
+                lines.append(line)
+                if len(lines) >= self.max_items:
+                    self._send(chat_id)
+
+    def flush(self):
+        """отправляем сводки всех чатов."""
+        with self._condition:
+            for chat_id in list(self._pending):
+                self._send(chat_id)
+
+    def _split(self, text: str) -> list:
+        text = str(text)
+        return [text[start:start + self.limit]
+                for start in range(0, max(len(text), 1), self.limit)]
+
+    @staticmethod
+    def _size(lines: list) -> int:
+        return sum(len(line) for line in lines) + len(lines) - 1
+
+    def _send(self, chat_id):
+        # вызывается под self._condition, поэтому порядок в чате сохраняется
+        lines = self._pending.pop(chat_id, None)
+        self._deadlines.pop(chat_id, None)
+        if lines:
+            self.bot.send_message(chat_id=chat_id, text='\n'.join(lines))
+
+    def _run(self):
+        with self._condition:
+            while not self._stopped:
+                now = time.monotonic()
+                for chat_id, deadline in list(self._deadlines.items()):
+                    if deadline <= now:
+                        self._send(chat_id)
+                timeout = min(self._deadlines.values(), default=None)
+                if timeout is not None:
+                    timeout -= now
+                self._condition.wait(timeout)
@@ -0,0 +1,224 @@
+"""Шардирование подопечных между процессами-воркерами.
+
+Воркеры отмечаются в общей базе SQLite, каждый строит консистентное
+кольцо из живых воркеров и берёт аренду на подопечных, которые попали
+на его участок кольца. При появлении или уходе воркера переезжает
+только небольшая доля подопечных. Кольцо перестраивается каждый цикл,
+а аренда продлевается ещё и фоновым потоком, чтобы не истечь посреди
+долгого цикла. У упавшего воркера она истекает через LEASE_TTL, и его
+подопечных забирают остальные.
+"""
+import bisect
+import hashlib
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+LEASES_PATH = os.getenv('LEASES_PATH')
+WORKER_ID = os.getenv('WORKER_ID') or f'{socket.gethostname()}-{os.getpid()}'
+LEASE_TTL = float(os.getenv('LEASE_TTL', 60))
+# виртуальных точек на воркера, сглаживают распределение
+REPLICAS = 64
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workers (
+    worker TEXT PRIMARY KEY,
+    expires REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    tenant TEXT PRIMARY KEY,
+    worker TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+"""
+ACQUIRE = """
+INSERT INTO leases (tenant, worker, expires) VALUES (?, ?, ?)
+ON CONFLICT (tenant) DO UPDATE
+SET worker = excluded.worker, expires = excluded.expires
+WHERE leases.worker = excluded.worker OR leases.expires < ?
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def point(key: str) -> int:
+    """точка ключа на кольце."""
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class HashRing:
+    """Консистентное кольцо воркеров."""
+
+    def __init__(self, workers, replicas: int = REPLICAS):
+        """у каждого воркера replicas точек на кольце."""
+        self._ring = sorted((point(f'{worker}#{number}'), worker)
+                            for worker in workers
+                            for number in range(replicas))
+        self._points = [position for position, _ in self._ring]
+
+    def owner(self, key: str):
+        """воркер, которому принадлежит ключ, или None без воркеров."""
+        if not self._ring:
+            return None
+        number = bisect.bisect(self._points, point(key)) % len(self._ring)
+        return self._ring[number][1]
+
+
+class Shard:
+    """Доля подопечных одного воркера, закреплённая арендой."""
+
+    def __init__(self, path: str, worker: str = WORKER_ID,
+                 ttl: float = LEASE_TTL):
+        """аренды и отметки воркеров хранятся в базе SQLite path."""
+        self.worker = worker
+        self.ttl = ttl
+        self.owned = set()
+        # потерянные при продлении, rebalance отдаст их как ушедших
+        self._dropped = set()
+        # до этого момента (time.time()) аренда owned точно наша
+        self._expires = 0.0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._connection = sqlite3.connect(
+            path, timeout=ttl, isolation_level=None,
+            check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+
+    @property
+    def renew_every(self) -> float:
+        """как часто продлевать аренду, чтобы она не истекла."""
+        return self.ttl / 3
+
+    def start(self):
+        """запускаем поток, продлевающий аренду каждые renew_every секунд."""
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._heartbeat,
+                                        name='shard-heartbeat', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """останавливаем поток продления аренды."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _heartbeat(self):
+        while not self._stopped.wait(self.renew_every):
+            try:
+                self.renew()
+            except sqlite3.Error as error:
+                logger.warning('Не удалось продлить аренду: %s', error)
+
+    def renew(self, now: float = None):
+        """продлеваем отметку воркера и аренду своих подопечных.
+
+        Кольцо не перестраивается: это дело rebalance на границе цикла.
+        Подопечные, чью аренду за время паузы забрали, из owned уходят.
+        """
+        now = time.time() if now is None else now
+        expires = now + self.ttl
+        with self._lock:
+            connection = self._connection
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                connection.execute(
+                    'INSERT OR REPLACE INTO workers VALUES (?, ?)',
+                    (self.worker, expires))
+                connection.execute(
+                    'UPDATE leases SET expires = ? WHERE worker = ?',
+                    (expires, self.worker))
+                owned = {name for name, in connection.execute(
+                    'SELECT tenant FROM leases WHERE worker = ?',
+                    (self.worker,))}
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            # после паузы дольше ttl аренду могли забрать другие воркеры,
+            # owned меняем на месте: на него же смотрит реестр
+            dropped = self.owned - owned
+            if dropped:
+                logger.warning('Аренду забрали другие воркеры: %s',
+                               ', '.join(sorted(dropped)))
+                self.owned -= dropped
+                self._dropped |= dropped
+            self._expires = expires
+
+    def holds(self, name: str, now: float = None) -> bool:
+        """аренда подопечного name у нас и ещё не истекла."""
+        now = time.time() if now is None else now
+        return name in self.owned and now < self._expires
+
+    def rebalance(self, names, now: float = None) -> tuple:
+        """продлеваем аренду своих подопечных, возвращаем (новые, ушедшие).
+
+        Подопечных, которые по кольцу теперь принадлежат другому
+        воркеру, отпускаем сразу, чужую живую аренду не трогаем.
+        """
+        now = time.time() if now is None else now
+        expires = now + self.ttl
+        with self._lock:
+            connection = self._connection
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                connection.execute(
+                    'INSERT OR REPLACE INTO workers VALUES (?, ?)',
+                    (self.worker, expires))
+                connection.execute('DELETE FROM workers WHERE expires < ?',
+                                   (now,))
+                ring = HashRing(worker for worker, in connection.execute(
+                    'SELECT worker FROM workers'))
+                wanted = {name for name in names
+                          if ring.owner(name) == self.worker}
+                connection.executemany(
+                    'DELETE FROM leases WHERE tenant = ? AND worker = ?',
+                    [(name, self.worker) for name in self.owned - wanted])
+                connection.executemany(
+                    ACQUIRE, [(name, self.worker, expires, now)
+                              for name in wanted])
+                owned = {name for name, in connection.execute(
+                    'SELECT tenant FROM leases WHERE worker = ?',
+                    (self.worker,))}
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            gained = owned - self.owned
+            lost = (self.owned | self._dropped) - owned
+            self.owned = owned
+            self._dropped = set()
+            self._expires = expires
+        return gained, lost
+
+    def assign(self, registry, tracker=None):
+        """перераспределяем подопечных реестра, опрашиваем только свои."""
+        gained, lost = self.rebalance(list(registry.tenants))
+        if gained:
+            # курсоры новых подопечных мог продвинуть прежний владелец
+            registry.load(gained)
+        if tracker is not None:
+            for name in lost:
+                tracker.forget(name)
+        registry.owned = self.owned
+        return gained, lost
+
+    def release(self):
+        """отпускаем аренду и уходим с кольца."""
+        self.stop()
+        with self._lock:
+            self._connection.execute(
+                'DELETE FROM leases WHERE worker = ?', (self.worker,))
+            self._connection.execute(
+                'DELETE FROM workers WHERE worker = ?', (self.worker,))
+        self.owned = set()
+
+    def close(self):
+        """закрываем соединение с базой аренды."""
+        self._connection.close()
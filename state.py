@@ -0,0 +1,62 @@
+"""Хранилище состояния бота: курсор опроса и доставленные статусы."""
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cursors (
+    tenant TEXT PRIMARY KEY,
+    from_date INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS statuses (
+    tenant TEXT NOT NULL,
+    homework TEXT NOT NULL,
+    status TEXT NOT NULL,
+    PRIMARY KEY (tenant, homework)
+);
+"""
+
+DEFAULT_TENANT = 'default'
+
+
+class StateStore:
+    """Состояние в SQLite, переживающее перезапуск бота."""
+
+    def __init__(self, path: str):
+        """открываем базу path, ':memory:' - без записи на диск."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+
+    def load_cursor(self, tenant: str = DEFAULT_TENANT, default: int = 0):
+        """последний сохранённый current_date."""
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT from_date FROM cursors WHERE tenant = ?',
+                (tenant,)).fetchone()
+        return default if row is None else row[0]
+
+    def load_statuses(self, tenant: str = DEFAULT_TENANT) -> dict:
+        """доставленные статусы домашек подопечного."""
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT homework, status FROM statuses WHERE tenant = ?',
+                (tenant,)).fetchall()
+        return dict(rows)
+
+    def save_cycle(self, current_date: int, statuses: dict = None,
+                   tenant: str = DEFAULT_TENANT):
+        """сохраняем итог цикла опроса одной транзакцией."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO cursors VALUES (?, ?)',
+                (tenant, current_date))
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO statuses VALUES (?, ?, ?)',
+                [(tenant, homework, status)
+                 for homework, status in (statuses or {}).items()])
+
+    def close(self):
+        """закрываем базу."""
+        with self._lock:
+            self._connection.close()
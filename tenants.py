@@ -0,0 +1,155 @@
+"""Реестр подопечных: токены практикума, чаты и курсоры опроса."""
+import json
+import os
+import sqlite3
+import time
+from dataclasses import asdict, dataclass, field
+
+from scheduler import PollSchedule
+
+DEFAULT_INTERVAL = 600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tenants (
+    name TEXT PRIMARY KEY,
+    practicum_token TEXT NOT NULL,
+    chat_id TEXT NOT NULL,
+    from_date INTEGER NOT NULL DEFAULT 0,
+    interval INTEGER NOT NULL DEFAULT 600
+)
+"""
+
+
+@dataclass
+class Tenant:
+    """Один аккаунт практикума и чат, куда слать статусы."""
+
+    name: str
+    practicum_token: str
+    # чат или подписчики: список или строка через запятую, первый - владелец
+    chat_id: str
+    from_date: int = 0
+    interval: int = DEFAULT_INTERVAL
+    next_poll: float = field(default=0.0, compare=False)
+    poll_schedule: PollSchedule = field(default=None, compare=False,
+                                        repr=False)
+
+    def __post_init__(self):
+        """интервал подопечного - базовый для адаптивного расписания."""
+        if self.poll_schedule is None:
+            self.poll_schedule = PollSchedule(interval=self.interval)
+
+    @property
+    def headers(self) -> dict:
+        """заголовки авторизации для запроса к API."""
+        return {'Authorization': f'OAuth {self.practicum_token}'}
+
+    def reschedule(self, now: float = None):
+        """назначаем следующий опрос по адаптивному расписанию."""
+        now = time.time() if now is None else now
+        self.next_poll = now + self.poll_schedule.delay
+
+    def disable(self):
+        """больше не опрашиваем до перезапуска."""
+        self.next_poll = float('inf')
+
+
+class TenantRegistry:
+    """Реестр подопечных из JSON-файла или базы SQLite."""
+
+    def __init__(self, path: str):
+        """реестр читается из path: .json файла или базы SQLite."""
+        self.path = path
+        self.tenants = {}
+        # имена подопечных этого воркера при шардировании, None - все
+        self.owned = None
+        self.load()
+
+    @property
+    def is_sqlite(self) -> bool:
+        """реестр хранится в SQLite, а не в JSON."""
+        return not self.path.endswith('.json')
+
+    def __iter__(self):
+        """перебор подопечных."""
+        return iter(list(self.tenants.values()))
+
+    def __len__(self):
+        """число подопечных."""
+        return len(self.tenants)
+
+    def load(self, names=None):
+        """читаем подопечных из хранилища, всех или только names."""
+        if self.is_sqlite:
+            rows = self._load_sqlite()
+        else:
+            rows = self._load_json()
+        now = time.time()
+        for row in rows:
+            if names is not None and row['name'] not in names:
+                continue
+            tenant = Tenant(**row)
+            if not tenant.from_date:
+                tenant.from_date = int(now)
+            self.tenants[tenant.name] = tenant
+
+    def _load_json(self) -> list:
+        with open(self.path, encoding='utf-8') as file:
+            rows = json.load(file)
+        if not isinstance(rows, list):
+            raise TypeError(f'В {self.path} ожидается список подопечных, '
+                            f'а вернулось - {type(rows)}')
+        return rows
+
+    def _load_sqlite(self) -> list:
+        with sqlite3.connect(self.path) as connection:
+            connection.execute(SCHEMA)
+            connection.row_factory = sqlite3.Row
+            rows = connection.execute('SELECT * FROM tenants').fetchall()
+        return [dict(row) for row in rows]
+
+    def save(self, names=None):
+        """сохраняем курсоры from_date всех подопечных.
+
+        names ограничивает запись в SQLite теми, кого опросили: курсоры
+        подопечных, ушедших к другому воркеру, не перетираем.
+        """
+        if self.is_sqlite:
+            self._save_sqlite(names)
+        else:
+            self._save_json()
+
+    def _save_json(self):
+        rows = [asdict(tenant) for tenant in self.tenants.values()]
+        for row in rows:
+            row.pop('next_poll')
+            row.pop('poll_schedule')
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(rows, file, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _save_sqlite(self, names=None):
+        with sqlite3.connect(self.path) as connection:
+            connection.executemany(
+                'UPDATE tenants SET from_date = ? WHERE name = ?',
+                [(tenant.from_date, tenant.name)
+                 for tenant in self._active()
+                 if names is None or tenant.name in names])
+
+    def _active(self) -> list:
+        if self.owned is None:
+            return list(self.tenants.values())
+        return [tenant for tenant in self.tenants.values()
+                if tenant.name in self.owned]
+
+    def due(self, now: float = None) -> list:
+        """подопечные, которых пора опрашивать."""
+        now = time.time() if now is None else now
+        return [tenant for tenant in self._active()
+                if tenant.next_poll <= now]
+
+    def next_due(self) -> float:
+        """время ближайшего опроса."""
+        return min((tenant.next_poll for tenant in self._active()),
+                   default=time.time() + DEFAULT_INTERVAL)
@@ -1,9 +1,36 @@
 import sys
 from os.path import abspath, dirname
 
+import pytest
+import requests
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 
 pytest_plugins = [
     'tests.fixtures.fixture_data'
 ]
+
+
+class RequestsSession:
+    """Сессия transport, которая ходит через requests.get.
+
+    Тесты подменяют requests.get, а таймауты, бюджет цикла и повторы
+    transport.get при этом работают как обычно.
+    """
+
+    def get(self, url, **kwargs):
+        return requests.get(url, **kwargs)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def plain_requests_transport(monkeypatch):
+    """Общая сессия transport - RequestsSession, настройки восстановятся."""
+    import transport
+
+    monkeypatch.setattr(transport, '_session', RequestsSession())
+    for name in ('_timeout', '_hedger'):
+        monkeypatch.setattr(transport, name, getattr(transport, name))
@@ -1,8 +1,31 @@
 import random
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import pytest
 
+STATUSES = ('approved', 'reviewing', 'rejected')
+
+
+def make_homework(number, rng):
+    updated = datetime(2022, 1, 1) + timedelta(minutes=rng.randint(0, 10**6))
+    return {
+        'id': number,
+        'status': rng.choice(STATUSES),
+        'homework_name': f'student__hw{number:05d}.zip',
+        'reviewer_comment': 'Всё нравится' * rng.randint(0, 3),
+        'date_updated': updated.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'lesson_name': f'Спринт {number % 20}'
+    }
+
+
+def make_response(count, seed=0):
+    """Воспроизводимый ответ API с count домашками."""
+    rng = random.Random(seed)
+    return {
+        'homeworks': [make_homework(number, rng) for number in range(count)],
+        'current_date': 1000198000 + count
+    }
+
 
 @pytest.fixture
 def random_timestamp():
@@ -19,3 +42,8 @@ def current_timestamp():
 @pytest.fixture
 def api_url():
     return 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+
+
+@pytest.fixture
+def homework_response():
+    return make_response(100)
@@ -0,0 +1,130 @@
+import asyncio
+import socket
+import time
+
+import pytest
+import requests
+
+from loadtest.stubs import API_PATH, PracticumHandler, PracticumStub, serve
+from utils import RecordingBot
+
+
+class MockResponse:
+    status_code = 200
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+class TestAio:
+
+    def test_poll_once_without_session(self, monkeypatch):
+        payload = {
+            'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+            'current_date': 42
+        }
+        monkeypatch.setattr(
+            requests, 'get', lambda *args, **kwargs: MockResponse(payload)
+        )
+        import aio
+
+        bot = RecordingBot()
+        timestamp = asyncio.run(
+            aio.poll_once(None, bot, 1, {'Authorization': 'OAuth t'}, 0)
+        )
+        assert timestamp == 42, (
+            'Проверьте, что асинхронный цикл возвращает current_date'
+        )
+        assert bot.messages == [
+            (1, 'Изменился статус проверки работы "hw". '
+                'Работа проверена: ревьюеру всё понравилось. Ура!')
+        ]
+
+    def test_poll_once_with_aiohttp_session(self, monkeypatch):
+        aiohttp = pytest.importorskip('aiohttp')
+        import aio
+
+        stub = PracticumStub(churn=0)
+        server = serve(PracticumHandler, stub)
+        monkeypatch.setattr(
+            aio, 'ENDPOINT',
+            f'http://127.0.0.1:{server.server_address[1]}{API_PATH}')
+        bot = RecordingBot()
+
+        async def poll():
+            async with aiohttp.ClientSession() as session:
+                return await aio.poll_once(
+                    session, bot, 1, {'Authorization': 'OAuth t'}, 0,
+                    tenant='aio-session')
+
+        try:
+            timestamp = asyncio.run(poll())
+        finally:
+            server.shutdown()
+        assert stub.requests == 1, 'Запрос должен уйти через aiohttp'
+        assert timestamp > 0, (
+            'Проверьте, что асинхронный цикл возвращает current_date'
+        )
+        assert len(bot.messages) == stub.homeworks, (
+            'Статусы всех работ с from_date=0 должны уйти в телеграм'
+        )
+
+    def test_semaphore_bounds_concurrency(self, monkeypatch):
+        import aio
+        from tenants import Tenant
+
+        in_flight = []
+        peak = []
+
+        async def fake_poll_once(session, bot, chat_id, headers, timestamp,
+                                 *args):
+            in_flight.append(1)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.pop()
+            return timestamp
+
+        monkeypatch.setattr(aio, 'poll_once', fake_poll_once)
+        tenants = [Tenant(str(i), 't', str(i), from_date=1) for i in range(10)]
+
+        async def poll_all():
+            semaphore = asyncio.Semaphore(3)
+            await asyncio.gather(*(
+                aio.poll_tenant(semaphore, None, None, tenant)
+                for tenant in tenants
+            ))
+
+        asyncio.run(poll_all())
+        assert max(peak) == 3, (
+            'Проверьте, что семафор ограничивает число одновременных опросов'
+        )
+
+    def test_request_stops_at_cycle_deadline(self, monkeypatch):
+        aiohttp = pytest.importorskip('aiohttp')
+        import aio
+        from exception import ApiResponseError
+
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen(8)
+        monkeypatch.setattr(
+            aio, 'ENDPOINT', f'http://127.0.0.1:{server.getsockname()[1]}/')
+
+        async def request():
+            async with aiohttp.ClientSession() as session:
+                return await aio.get_api_answer(
+                    session, 0, {'Authorization': 'OAuth t'},
+                    time.monotonic() + 0.5)
+
+        started = time.monotonic()
+        try:
+            with pytest.raises(ApiResponseError):
+                asyncio.run(request())
+        finally:
+            server.close()
+        assert time.monotonic() - started < 2, (
+            'Асинхронный запрос не должен выходить за бюджет цикла'
+        )
@@ -0,0 +1,42 @@
+from alerts import ErrorAlerts
+from exception import ApiResponseError
+
+
+class TestAlerts:
+
+    def test_repeated_error_is_suppressed(self):
+        alerts = ErrorAlerts(window=3600)
+        assert alerts.check(ApiResponseError('from_date=100')) == 0
+        assert alerts.check(ApiResponseError('from_date=700')) is None, (
+            'Проверьте, что ошибка, отличающаяся только числами, подавляется'
+        )
+        assert alerts.check(ValueError('from_date=700')) == 0
+
+    def test_suppressed_count_after_window(self, monkeypatch):
+        import alerts as alerts_module
+
+        moments = iter([0, 1, 2, 20])
+        monkeypatch.setattr(alerts_module.time, 'monotonic',
+                            lambda: next(moments))
+        alerts = ErrorAlerts(window=10)
+        checks = [alerts.check(ApiResponseError('boom')) for _ in range(4)]
+        assert checks == [0, None, None, 2], (
+            'Проверьте, что после окна подавления ошибка отправляется '
+            'с числом пропущенных повторов'
+        )
+
+    def test_single_recovered_notification(self):
+        alerts = ErrorAlerts()
+        assert not alerts.recovered('student')
+        alerts.check(ApiResponseError('boom'), 'student')
+        assert alerts.recovered('student')
+        assert not alerts.recovered('student'), (
+            'Проверьте, что о восстановлении сообщается один раз'
+        )
+        assert alerts.check(ApiResponseError('boom'), 'student') == 0
+
+    def test_memory_is_bounded(self):
+        alerts = ErrorAlerts(max_errors=10)
+        for number in range(100):
+            alerts.check(ApiResponseError('boom'), str(number))
+        assert len(alerts._errors) == 10
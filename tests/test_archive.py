@@ -0,0 +1,128 @@
+import asyncio
+import json
+
+import pytest
+
+import archive
+import homework
+from loadtest.stubs import API_PATH, PracticumHandler, PracticumStub, serve
+
+
+def body(status, current_date):
+    return json.dumps({
+        'homeworks': [{'id': 1, 'homework_name': 'hw.zip',
+                       'status': status}],
+        'current_date': current_date,
+    }).encode('utf-8')
+
+
+class BytesResponse:
+    status_code = 200
+
+    def __init__(self, content):
+        self.content = content
+
+
+class TestArchive:
+
+    def test_roundtrip_and_index_search(self, tmp_path):
+        recorder = archive.Recorder(str(tmp_path), segment_bytes=64)
+        for number in range(5):
+            recorder.append(body('reviewing', number), timestamp=number)
+        recorder.close()
+        assert len(list(tmp_path.glob('*.seg'))) > 1, (
+            'Архив должен делиться на сегменты по размеру'
+        )
+        records = list(archive.read_archive(str(tmp_path)))
+        assert [timestamp for timestamp, _ in records] == [0, 1, 2, 3, 4]
+        assert records[2][1] == body('reviewing', 2), (
+            'Из архива должно читаться исходное тело ответа'
+        )
+        found = archive.read_archive(str(tmp_path), since=1.5, until=3)
+        assert [timestamp for timestamp, _ in found] == [2, 3], (
+            'Чтение должно начинаться с нужной метки времени'
+        )
+
+    def test_replay_sends_only_changes(self, tmp_path):
+        recorder = archive.Recorder(str(tmp_path))
+        recorder.append(body('reviewing', 1), timestamp=1)
+        recorder.append(body('reviewing', 2), timestamp=2)
+        recorder.append(b'{"homeworks": [', timestamp=3)
+        recorder.append(body('approved', 4), timestamp=4)
+        recorder.close()
+        bot = archive.replay(str(tmp_path))
+        assert bot.messages == 2, (
+            'При воспроизведении должны отправляться только смены статуса'
+        )
+        assert bot.errors == 1, 'Битый ответ должен считаться ошибкой'
+
+    def test_since_filters_each_frame(self, tmp_path):
+        recorder = archive.Recorder(str(tmp_path))
+        # метки с явным временем могут идти не по порядку
+        for timestamp in (1, 2, 4, 3, 5):
+            recorder.append(body('reviewing', timestamp),
+                            timestamp=timestamp)
+        recorder.close()
+        found = archive.read_archive(str(tmp_path), since=3.5)
+        assert [timestamp for timestamp, _ in found] == [4, 5], (
+            'Кадры раньше since не должны попадать в выборку'
+        )
+
+    def test_truncated_frame_ends_segment(self, tmp_path):
+        recorder = archive.Recorder(str(tmp_path))
+        recorder.append(body('reviewing', 1), timestamp=1)
+        recorder.append(body('approved', 2), timestamp=2)
+        recorder.close()
+        segment, = tmp_path.glob('*.seg')
+        with open(segment, 'r+b') as file:
+            file.truncate(segment.stat().st_size - 5)
+        records = list(archive.read_archive(str(tmp_path)))
+        assert [timestamp for timestamp, _ in records] == [1], (
+            'Недописанный кадр в конце сегмента нужно пропускать'
+        )
+        with open(segment, 'ab') as file:
+            file.write(b'x' * 5)
+        assert archive.replay(str(tmp_path)).messages == 1, (
+            'Битый кадр не должен ронять воспроизведение'
+        )
+
+    def test_fetch_records_raw_body(self, tmp_path, monkeypatch):
+        recorder = archive.Recorder(str(tmp_path))
+        monkeypatch.setattr(homework, 'recorder', recorder)
+        monkeypatch.setattr(
+            homework.transport, 'get',
+            lambda **kwargs: BytesResponse(body('approved', 7)))
+        assert homework.get_api_answer(0)['current_date'] == 7
+        recorder.close()
+        [(_, recorded)] = archive.read_archive(str(tmp_path))
+        assert recorded == body('approved', 7), (
+            'get_api_answer должен записывать сырой ответ в архив'
+        )
+
+    def test_async_session_records_responses(self, tmp_path, monkeypatch):
+        aiohttp = pytest.importorskip('aiohttp')
+        import aio
+
+        stub = PracticumStub(churn=0)
+        server = serve(PracticumHandler, stub)
+        monkeypatch.setattr(
+            aio, 'ENDPOINT',
+            f'http://127.0.0.1:{server.server_address[1]}{API_PATH}')
+        recorder = archive.Recorder(str(tmp_path))
+        monkeypatch.setattr(homework, 'recorder', recorder)
+
+        async def fetch():
+            async with aiohttp.ClientSession() as session:
+                return await aio.get_api_answer(
+                    session, 0, {'Authorization': 'OAuth t'})
+
+        try:
+            response = asyncio.run(fetch())
+        finally:
+            server.shutdown()
+        recorder.close()
+        records = list(archive.read_archive(str(tmp_path)))
+        assert len(records) == 1, (
+            'Ответ, полученный через aiohttp, тоже должен попадать в архив'
+        )
+        assert json.loads(records[0][1]) == response
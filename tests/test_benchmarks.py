@@ -0,0 +1,45 @@
+from tests.fixtures.fixture_data import make_response
+
+
+class TestBenchmarks:
+
+    def test_synthetic_response_is_reproducible(self):
+        assert make_response(50, seed=1) == make_response(50, seed=1)
+
+    def test_synthetic_response_is_valid(self, homework_response):
+        import homework
+
+        homeworks = homework.check_response(homework_response)
+        assert len(homeworks) == 100
+        for item in homeworks:
+            homework.parse_status(item)
+
+    def test_regression_is_detected(self):
+        import sys
+        from os.path import abspath, dirname, join
+
+        sys.path.append(join(dirname(dirname(abspath(__file__))),
+                             'benchmarks'))
+        import bench_pipeline
+
+        baseline = {'parse_status[1]': 1.0, 'check_response[1]': 1.0}
+        results = {'parse_status[1]': 2.0, 'check_response[1]': 1.1}
+        regressions = bench_pipeline.compare(results, baseline)
+        assert len(regressions) == 1
+        assert regressions[0].startswith('parse_status[1]')
+
+    def test_heavy_clients_are_imported_lazily(self):
+        import subprocess
+        import sys
+        from os.path import abspath, dirname
+
+        code = ('import sys, homework; '
+                'print(sorted({"telegram", "requests", "asyncio"} '
+                '& set(sys.modules)))')
+        output = subprocess.run(
+            [sys.executable, '-c', code], check=True, text=True,
+            capture_output=True,
+            cwd=dirname(dirname(abspath(__file__)))).stdout
+        assert output.strip() == '[]', (
+            'import homework не должен сразу тянуть telegram и requests'
+        )
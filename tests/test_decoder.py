@@ -0,0 +1,28 @@
+import pytest
+
+import decoder
+
+
+class BytesResponse:
+    content = b'{"homeworks": [], "current_date": 1}'
+
+    def json(self):
+        raise AssertionError('Тело ответа должно разбираться один раз')
+
+
+class TestDecoder:
+
+    @pytest.mark.parametrize('backend', list(decoder.BACKENDS))
+    def test_decode_bytes_once(self, backend, monkeypatch):
+        monkeypatch.setattr(decoder, 'backend', backend)
+        assert decoder.decode_response(BytesResponse()) == {
+            'homeworks': [], 'current_date': 1
+        }
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            decoder.use('unknown')
+
+    def test_invalid_json_is_value_error(self):
+        with pytest.raises(ValueError):
+            decoder.loads(b'{not json')
@@ -0,0 +1,67 @@
+from telegram import TelegramError
+
+import homework
+from sender import MessageQueue, recipients
+from tracker import StatusTracker
+from utils import RecordingBot
+
+HOMEWORKS = [{'id': 1, 'homework_name': 'hw.zip', 'status': 'approved'}]
+
+
+class MockBot(RecordingBot):
+
+    def __init__(self, broken=()):
+        super().__init__()
+        self.broken = broken
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if chat_id in self.broken:
+            raise TelegramError('chat not found')
+        super().send_message(chat_id, text, **kwargs)
+
+
+class TestFanout:
+
+    def test_recipients(self):
+        assert recipients('1, 2,3') == ('1', '2', '3')
+        assert recipients(['1', '2']) == ('1', '2')
+        assert recipients(5) == (5,)
+
+    def test_status_rendered_once_for_all(self, monkeypatch):
+        calls = []
+        parse_status = homework.parse_status
+
+        def counting_parse_status(item):
+            calls.append(item)
+            return parse_status(item)
+
+        monkeypatch.setattr(homework, 'parse_status', counting_parse_status)
+        bot = MockBot()
+        homework.report_homeworks(bot, ['student', 'mentor', 'group'],
+                                  HOMEWORKS, StatusTracker())
+        assert len(calls) == 1, 'Сообщение должно собираться один раз'
+        assert [chat for chat, _ in bot.messages] == [
+            'student', 'mentor', 'group']
+        assert len({id(text) for _, text in bot.messages}) == 1
+
+    def test_failed_subscriber_does_not_block_others(self):
+        bot = MockBot(broken=('mentor',))
+        tracker = StatusTracker()
+        delivered = homework.report_homeworks(
+            bot, ['student', 'mentor', 'group'], HOMEWORKS, tracker)
+        assert [chat for chat, _ in bot.messages] == ['student', 'group'], (
+            'Сбой у одного подписчика не должен мешать остальным'
+        )
+        assert delivered == {'1': 'approved'}, (
+            'Статус, доставленный хотя бы одному подписчику, '
+            'не должен рассылаться заново'
+        )
+
+    def test_parallel_delivery_through_queue(self):
+        bot = MockBot()
+        messages = MessageQueue(bot, workers=3, global_rate=1000,
+                                chat_rate=1000).start()
+        homework.send_to_chat(messages, 'a,b,c', 'hello')
+        messages.stop()
+        assert sorted(bot.messages) == [
+            ('a', 'hello'), ('b', 'hello'), ('c', 'hello')]
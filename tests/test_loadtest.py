@@ -0,0 +1,78 @@
+import threading
+import time
+
+import pytest
+import telegram
+
+from loadtest.stubs import (API_PATH, PracticumHandler, PracticumStub,
+                            TelegramHandler, TelegramStub, serve)
+
+
+@pytest.fixture
+def practicum():
+    stub = PracticumStub(churn=1.0)
+    server = serve(PracticumHandler, stub)
+    yield stub, f'http://127.0.0.1:{server.server_address[1]}{API_PATH}'
+    server.shutdown()
+
+
+class TestLoadtestStubs:
+
+    def test_practicum_stub_answers_like_api(self, monkeypatch, practicum):
+        import homework
+
+        stub, endpoint = practicum
+        monkeypatch.setattr(homework, 'ENDPOINT', endpoint)
+        response = homework.fetch_api_answer(1, {'Authorization': 'OAuth t'})
+        homeworks = homework.check_response(response)
+        assert len(homeworks) == 1
+        homework.parse_status(homeworks[0])
+        assert stub.requests == 1
+
+    def test_practicum_stub_errors(self, monkeypatch, practicum):
+        import homework
+        from exception import ApiResponseError, ResponseCodeError
+
+        stub, endpoint = practicum
+        monkeypatch.setattr(homework, 'ENDPOINT', endpoint)
+        stub.error_rate = 1.0
+        with pytest.raises(ResponseCodeError):
+            homework.fetch_api_answer(0, {'Authorization': 'OAuth t'})
+        stub.error_rate, stub.malformed_rate = 0.0, 1.0
+        with pytest.raises(ApiResponseError):
+            homework.fetch_api_answer(0, {'Authorization': 'OAuth t'})
+
+    def test_telegram_stub_accepts_messages(self):
+        stub = TelegramStub()
+        server = serve(TelegramHandler, stub)
+        base_url = f'http://127.0.0.1:{server.server_address[1]}/bot'
+        try:
+            bot = telegram.Bot(token='123456:' + 'x' * 35, base_url=base_url)
+            message = bot.send_message(chat_id=1, text='hello')
+        finally:
+            server.shutdown()
+        assert message.text == 'hello'
+        assert stub.messages == 1
+
+    def test_shared_bot_sends_in_parallel(self):
+        import homework
+        stub = TelegramStub(latency=0.2)
+        server = serve(TelegramHandler, stub)
+        base_url = f'http://127.0.0.1:{server.server_address[1]}/bot'
+        bot = homework.telegram_bot('123456:' + 'x' * 35, base_url,
+                                    pool_size=8)
+        threads = [threading.Thread(target=bot.send_message,
+                                    kwargs={'chat_id': 1, 'text': 'hi'})
+                   for _ in range(8)]
+        started = time.monotonic()
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            server.shutdown()
+        assert stub.messages == 8
+        assert time.monotonic() - started < 0.2 * 8 / 2, (
+            'Потоки отправки с общим ботом не должны ждать друг друга'
+        )
@@ -0,0 +1,29 @@
+import logging
+
+from logs import SAMPLED, LazyQueueHandler, SampleFilter
+
+
+def make_record(extra=None):
+    logger = logging.getLogger('test_logs')
+    return logger.makeRecord('test_logs', logging.INFO, __file__, 1,
+                             'ответ %s', ({'homeworks': []},), None,
+                             extra=extra)
+
+
+class TestLogs:
+
+    def test_unsampled_records_always_pass(self):
+        assert SampleFilter(rate=0).filter(make_record())
+
+    def test_sampled_records_are_dropped(self):
+        assert not SampleFilter(rate=0).filter(make_record(SAMPLED)), (
+            'Проверьте, что подробные записи пишутся выборочно'
+        )
+        assert SampleFilter(rate=1).filter(make_record(SAMPLED))
+
+    def test_queue_handler_defers_formatting(self):
+        record = make_record()
+        prepared = LazyQueueHandler(None).prepare(record)
+        assert prepared.msg == 'ответ %s' and prepared.args, (
+            'Проверьте, что сообщение форматируется не в потоке опроса'
+        )
@@ -0,0 +1,76 @@
+import urllib.request
+
+import pytest
+
+import metrics
+
+
+class TestMetrics:
+
+    def test_timed_records_latency_and_failures(self):
+        @metrics.timed('test_stage')
+        def stage(fail):
+            if fail:
+                raise ValueError('boom')
+
+        stage(False)
+        with pytest.raises(ValueError):
+            stage(True)
+        assert metrics.stage_seconds.count('test_stage') == 2
+        assert metrics.stage_failures.value('test_stage', 'ValueError') == 1
+
+    def test_timed_keeps_signature(self):
+        import homework
+        from inspect import signature
+
+        assert len(signature(homework.get_api_answer).parameters) == 1
+        assert len(signature(homework.parse_status).parameters) == 1
+
+    def test_api_request_is_timed(self, monkeypatch):
+        import homework
+
+        class Response:
+            status_code = 200
+            content = b'{"homeworks": [], "current_date": 1}'
+
+        monkeypatch.setattr(homework.transport, 'get',
+                            lambda **kwargs: Response())
+        before = metrics.stage_seconds.count('get_api_answer')
+        homework.fetch_api_answer(0, {})
+        assert metrics.stage_seconds.count('get_api_answer') == before + 1, (
+            'Запрос к API должен попадать в метрику get_api_answer'
+        )
+
+    def test_quota_wait_is_not_timed(self, monkeypatch):
+        import homework
+
+        class Response:
+            status_code = 200
+            content = b'{"homeworks": [], "current_date": 1}'
+
+        monkeypatch.setattr(homework.transport, 'get',
+                            lambda **kwargs: Response())
+        monkeypatch.setattr(homework, 'quota_delay',
+                            lambda headers, deadline=None: 0.2)
+        before = metrics.stage_seconds._values.get(
+            ('get_api_answer',), (None, 0.0, 0))[1]
+        homework.fetch_api_answer(0, {})
+        total = metrics.stage_seconds._values[('get_api_answer',)][1]
+        assert total - before < 0.2, (
+            'Ожидание квоты не должно попадать в метрику get_api_answer'
+        )
+
+    def test_endpoint_serves_prometheus_text(self):
+        metrics.errors.inc('ApiResponseError')
+        metrics.queue_depth.set_function(lambda: 3)
+        server = metrics.serve(0)
+        try:
+            port = server.server_address[1]
+            with urllib.request.urlopen(
+                    f'http://127.0.0.1:{port}/metrics') as response:
+                body = response.read().decode('utf-8')
+        finally:
+            server.shutdown()
+        assert '# TYPE homework_stage_seconds histogram' in body
+        assert 'homework_errors_total{exception="ApiResponseError"}' in body
+        assert 'homework_send_queue_depth 3' in body
@@ -0,0 +1,35 @@
+import pytest
+
+from models import Homework, Verdict, intern_status
+
+
+class TestModels:
+
+    def test_record_from_dict(self):
+        record = Homework.from_dict(
+            {'id': 7, 'homework_name': 'hw', 'status': 'approved'}
+        )
+        assert record == Homework(7, 'hw', Verdict.APPROVED)
+        assert record.status is Verdict.APPROVED
+        assert record.key == '7'
+        assert not hasattr(record, '__dict__'), (
+            'Проверьте, что запись Homework не хранит __dict__'
+        )
+        with pytest.raises(AttributeError):
+            record.status = Verdict.REJECTED
+
+    def test_record_keeps_errors(self):
+        with pytest.raises(KeyError):
+            Homework.from_dict({'status': 'approved'})
+        with pytest.raises(ValueError):
+            Homework.from_dict({'homework_name': 'hw', 'status': 'unknown'})
+        with pytest.raises(ValueError):
+            Homework.from_dict({'homework_name': 'hw'})
+
+    def test_key_falls_back_to_name(self):
+        assert Homework(None, 'hw', Verdict.REVIEWING).key == 'hw'
+
+    def test_statuses_are_shared(self):
+        assert intern_status('approved') is Verdict.APPROVED
+        assert intern_status(''.join(['un', 'known'])) is intern_status(
+            'unknown')
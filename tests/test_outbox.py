@@ -0,0 +1,145 @@
+import time
+
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+import sender
+from outbox import Outbox
+from sender import MessageQueue
+from utils import RecordingBot
+
+
+class FlakyBot(RecordingBot):
+
+    def __init__(self, down=True):
+        super().__init__()
+        self.down = down
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if self.down:
+            raise NetworkError('телеграм недоступен')
+        super().send_message(str(chat_id), text, **kwargs)
+
+
+class TestOutbox:
+
+    def test_messages_survive_restart(self, tmp_path):
+        path = str(tmp_path / 'outbox.sqlite3')
+        outbox = Outbox(path)
+        outbox.add(1, 'первое')
+        outbox.add(1, 'второе', {'parse_mode': 'HTML'})
+        outbox.commit()
+        restored = Outbox(path)
+        assert restored.depth == 2, (
+            'Недоставленные сообщения должны пережить перезапуск')
+        assert restored.has_pending(1), (
+            'Чат с недоставленными сообщениями должен считаться ждущим')
+        sent = []
+        restored._send = lambda chat, text, options: sent.append(
+            (chat, text, options))
+        restored.deliver_due()
+        assert sent == [('1', 'первое', {}),
+                        ('1', 'второе', {'parse_mode': 'HTML'})], (
+            'Повтор должен идти по порядку и с параметрами отправки')
+        assert restored.depth == 0, 'Доставленное должно уходить из базы'
+
+    def test_failed_chat_waits_backoff_in_order(self, tmp_path):
+        outbox = Outbox(str(tmp_path / 'outbox.sqlite3'), retry_delay=10)
+        for chat, text in (('a', '1'), ('b', '1'), ('a', '2')):
+            outbox.add(chat, text)
+        outbox.commit()
+        sent = []
+
+        def send(chat, text, options):
+            if chat == 'a' and not sent:
+                raise NetworkError('сбой')
+            sent.append((chat, text))
+
+        outbox._send = send
+        outbox.deliver_due(now=100)
+        assert sent == [('b', '1')], (
+            'Сбой в одном чате не должен задерживать другие, '
+            'а следующие сообщения чата должны ждать первое')
+        outbox.deliver_due(now=105)
+        assert sent == [('b', '1')], 'Повтор должен ждать паузу'
+        outbox.deliver_due(now=110)
+        assert sent == [('b', '1'), ('a', '1'), ('a', '2')], (
+            'После паузы сообщения чата должны уйти по порядку')
+
+    def test_gives_up_after_max_attempts(self, tmp_path):
+        outbox = Outbox(str(tmp_path / 'outbox.sqlite3'), retry_delay=0,
+                        max_attempts=2)
+        outbox.add(1, 'текст')
+        outbox.commit()
+
+        def send(chat, text, options):
+            raise NetworkError('сбой')
+
+        outbox._send = send
+        outbox.deliver_due()
+        assert outbox.depth == 1, 'Сообщение должно ждать следующей попытки'
+        outbox.deliver_due()
+        assert outbox.depth == 0, (
+            'После max_attempts попыток сообщение должно выбрасываться')
+
+    def test_rejected_message_is_dropped(self, tmp_path):
+        outbox = Outbox(str(tmp_path / 'outbox.sqlite3'), retry_delay=10)
+        outbox.add(1, 'битое')
+        outbox.add(1, 'следующее')
+        outbox.commit()
+        sent = []
+
+        def send(chat, text, options):
+            if text == 'битое':
+                raise BadRequest('Message is too long')
+            sent.append(text)
+
+        outbox._send = send
+        outbox.deliver_due(now=100)
+        assert sent == ['следующее'], (
+            'Отвергнутое телеграмом сообщение повторять нельзя, '
+            'и оно не должно задерживать чат')
+        assert outbox.depth == 0
+
+    def test_retry_after_sets_delay(self, tmp_path):
+        outbox = Outbox(str(tmp_path / 'outbox.sqlite3'), retry_delay=1)
+        outbox.add(1, 'текст')
+        outbox.commit()
+        calls = []
+
+        def send(chat, text, options):
+            calls.append(text)
+            raise RetryAfter(30)
+
+        outbox._send = send
+        outbox.deliver_due(now=100)
+        outbox.deliver_due(now=129)
+        assert len(calls) == 1, 'До конца паузы RetryAfter повторять нельзя'
+        outbox.deliver_due(now=130)
+        assert len(calls) == 2, (
+            'Пауза должна быть такой, какую просит RetryAfter')
+
+    def test_queue_redelivers_after_outage(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(sender, 'RETRY_DELAY', 10)
+        bot = FlakyBot()
+        outbox = Outbox(str(tmp_path / 'outbox.sqlite3'),
+                        commit_interval=0.01, retry_delay=0.05)
+        messages = MessageQueue(bot, workers=2, global_rate=1000,
+                                chat_rate=1000, chat_burst=1000,
+                                outbox=outbox).start()
+        started = time.monotonic()
+        for number in range(5):
+            messages.send_message(chat_id=7, text=str(number))
+        messages.join()
+        assert time.monotonic() - started < 5, (
+            'С outbox поток отправки не должен повторять с паузами сам'
+        )
+        assert outbox.depth == 5, (
+            'Сообщения, не принятые телеграмом, должны попадать в outbox')
+        bot.down = False
+        messages.send_message(chat_id=7, text='5')
+        started = time.monotonic()
+        while outbox.depth and time.monotonic() - started < 5:
+            time.sleep(0.01)
+        messages.stop()
+        assert bot.messages == [('7', str(number)) for number in range(6)], (
+            'После сбоя сообщения чата должны дойти по порядку')
@@ -0,0 +1,160 @@
+import os
+import signal
+import time
+
+import pytest
+
+import homework
+from alerts import ErrorAlerts
+from exception import (ApiResponseError,
+                       CircuitOpenError,
+                       FatalError,
+                       ResponseCodeError,
+                       SendMessageError)
+from policies import (BACKOFF,
+                      ENDPOINT,
+                      FATAL,
+                      RETRY,
+                      CircuitBreaker,
+                      Circuits,
+                      policy_for)
+from scheduler import PollSchedule
+from sender import MessageQueue
+from utils import RecordingBot
+
+
+class StatusResponse:
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class SlowBot(RecordingBot):
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        time.sleep(0.3)
+        super().send_message(chat_id, text, **kwargs)
+
+
+class TestPolicies:
+
+    def test_policy_lookup(self):
+        assert policy_for(ResponseCodeError('', 503)).action == RETRY
+        assert policy_for(ResponseCodeError('', 401)).action == FATAL
+        assert policy_for(ResponseCodeError('', 418)).action == BACKOFF, (
+            'Для неизвестного кода нужна политика класса исключения'
+        )
+        assert policy_for(SendMessageError('')).action == BACKOFF, (
+            'Политика должна искаться по родительским классам'
+        )
+        assert policy_for(KeyError()).action == BACKOFF
+
+    def test_breaker_opens_and_probes(self):
+        breaker = CircuitBreaker(threshold=2, reset=10)
+        breaker.failure(now=0)
+        assert breaker.allow(now=1)
+        assert breaker.failure(now=1), 'Второй отказ размыкает предохранитель'
+        assert not breaker.allow(now=5)
+        assert breaker.allow(now=12), 'После reset нужен пробный запрос'
+        assert not breaker.allow(now=13), 'Пробный запрос - только один'
+        breaker.success()
+        assert breaker.allow(now=14)
+
+    def test_transient_error_is_retried(self, monkeypatch):
+        responses = [StatusResponse(503), StatusResponse(200)]
+        monkeypatch.setattr(homework.transport, 'get',
+                            lambda **kwargs: responses.pop(0))
+        monkeypatch.setattr(homework.decoder, 'decode_response',
+                            lambda response: {'homeworks': []})
+        monkeypatch.setattr(homework.time, 'sleep', lambda seconds: None)
+        monkeypatch.setattr(homework, 'circuits', Circuits())
+        response = homework.fetch_with_retries(
+            0, {}, homework.time.monotonic() + 30)
+        assert response == {'homeworks': []}, (
+            'Ответ 503 должен сразу повторяться в том же цикле'
+        )
+
+    def test_open_circuit_skips_requests(self, monkeypatch):
+        circuits = Circuits(threshold=1, reset=60)
+        monkeypatch.setattr(homework, 'circuits', circuits)
+        circuits.failure(policy_for(ApiResponseError('')),
+                         homework.ENDPOINT, 'tenant')
+
+        def fail(**kwargs):
+            raise AssertionError('При разомкнутом предохранителе '
+                                 'запросов быть не должно')
+        monkeypatch.setattr(homework.transport, 'get', fail)
+        with pytest.raises(CircuitOpenError):
+            homework.fetch_with_retries(0, {}, 0, 'tenant')
+        assert not circuits.get(ENDPOINT, homework.ENDPOINT).allow()
+
+    def test_poll_once_uses_policy_backoff(self, monkeypatch):
+        monkeypatch.setattr(homework, 'circuits', Circuits())
+        monkeypatch.setattr(homework.transport, 'get',
+                            lambda **kwargs: StatusResponse(418))
+        schedule = PollSchedule(jitter=0)
+        bot = RecordingBot()
+        assert homework.poll_once(bot, 1, {}, 5, tenant='policy-backoff',
+                                  schedule=schedule) == 5
+        assert schedule.delay == policy_for(
+            ResponseCodeError('', 418)).interval
+
+    def test_unauthorized_is_fatal(self, monkeypatch):
+        monkeypatch.setattr(homework, 'circuits', Circuits())
+        monkeypatch.setattr(homework.transport, 'get',
+                            lambda **kwargs: StatusResponse(401))
+        bot = RecordingBot()
+        with pytest.raises(FatalError):
+            homework.poll_once(bot, 1, {}, 0, tenant='policy-fatal')
+        assert bot.messages, 'О фатальном сбое нужно сообщить в телеграм'
+
+    def prepare_main(self, monkeypatch, tmp_path, bot, get):
+        monkeypatch.setattr(homework, 'circuits', Circuits())
+        # main() меняет глобальные настройки, monkeypatch их вернёт,
+        # настройки transport возвращает conftest
+        monkeypatch.setattr(homework, 'error_alerts', ErrorAlerts())
+        monkeypatch.setattr(homework, 'limiter', None)
+        monkeypatch.setattr(homework, 'recorder', None)
+        monkeypatch.setattr(homework, 'STATE_PATH',
+                            str(tmp_path / 'state.sqlite3'))
+        monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', 'token')
+        monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', 'token')
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', '1')
+        monkeypatch.setattr(homework, 'create_bot', lambda: MessageQueue(
+            bot, global_rate=1000, chat_rate=1000, chat_burst=1000).start())
+        monkeypatch.setattr(homework.profiling, 'install', lambda: None)
+        monkeypatch.setattr(homework.transport, 'get', get)
+
+    def run_main(self):
+        # main() ставит обработчик SIGTERM, возвращаем прежний
+        previous = signal.getsignal(signal.SIGTERM)
+        try:
+            with pytest.raises(SystemExit) as exit_info:
+                homework.main()
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+        return exit_info.value
+
+    def test_main_sends_fatal_alert(self, monkeypatch, tmp_path):
+        bot = SlowBot()
+        self.prepare_main(monkeypatch, tmp_path, bot,
+                          lambda **kwargs: StatusResponse(401))
+        self.run_main()
+        assert len(bot.messages) == 2, (
+            'Перед выходом уведомление о фатальном сбое должно уйти '
+            'в телеграм'
+        )
+
+    def test_sigterm_drains_send_queue(self, monkeypatch, tmp_path):
+        bot = SlowBot()
+
+        def get(**kwargs):
+            os.kill(os.getpid(), signal.SIGTERM)
+            time.sleep(1)
+
+        self.prepare_main(monkeypatch, tmp_path, bot, get)
+        exit_error = self.run_main()
+        assert exit_error.code == 128 + signal.SIGTERM
+        assert len(bot.messages) == 1, (
+            'По SIGTERM очередь отправки должна дойти до телеграма'
+        )
@@ -0,0 +1,65 @@
+import os
+import signal
+import tracemalloc
+
+import pytest
+
+import profiling
+
+
+def busy():
+    return [str(number) for number in range(1000)]
+
+
+class TestProfiling:
+
+    def test_inactive_tick_does_nothing(self, tmp_path):
+        profiler = profiling.Profiler(str(tmp_path), cycles=2)
+        profiler.tick()
+        assert not os.listdir(tmp_path), (
+            'Без запроса профилирование не должно ничего писать'
+        )
+
+    def test_cpu_profile_over_cycles(self, tmp_path):
+        profiler = profiling.Profiler(str(tmp_path), cycles=2)
+        profiler.request_cpu()
+        for _ in range(3):
+            profiler.tick()
+            busy()
+        [name] = os.listdir(tmp_path)
+        assert name.startswith('cpu-') and name.endswith('.prof'), (
+            'После N циклов профиль CPU должен записаться в файл'
+        )
+        assert not profiler.cpu_requested
+
+    def test_memory_diff_over_cycles(self, tmp_path):
+        profiler = profiling.Profiler(str(tmp_path), cycles=1)
+        kept = []
+        profiler.request_memory()
+        profiler.tick()
+        kept.append(busy())
+        profiler.tick()
+        [name] = os.listdir(tmp_path)
+        assert name.startswith('memory-')
+        assert 'test_profiling.py' in (tmp_path / name).read_text(), (
+            'В разнице снимков должны быть строки с новыми выделениями'
+        )
+        assert not tracemalloc.is_tracing(), (
+            'tracemalloc должен выключаться после замера'
+        )
+
+    @pytest.mark.skipif(not hasattr(signal, 'SIGUSR1'),
+                        reason='нет SIGUSR1')
+    def test_signal_requests_profile(self, tmp_path):
+        profiler = profiling.Profiler(str(tmp_path))
+        previous = signal.getsignal(signal.SIGUSR1), signal.getsignal(
+            signal.SIGUSR2)
+        try:
+            profiling.install(profiler)
+            os.kill(os.getpid(), signal.SIGUSR1)
+            assert profiler.cpu_requested, (
+                'SIGUSR1 должен запрашивать профиль CPU'
+            )
+        finally:
+            signal.signal(signal.SIGUSR1, previous[0])
+            signal.signal(signal.SIGUSR2, previous[1])
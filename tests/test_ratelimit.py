@@ -0,0 +1,89 @@
+import pytest
+
+import homework
+from exception import RateLimitedError
+from ratelimit import QuotaLimiter, SharedTokenBucket, retry_after
+
+
+class ThrottledResponse:
+    status_code = 429
+    headers = {'Retry-After': '120'}
+
+
+class TestRateLimit:
+
+    def test_shared_bucket_between_connections(self, tmp_path):
+        path = str(tmp_path / 'ratelimit.sqlite3')
+        first = SharedTokenBucket(path, rate=1, capacity=2)
+        second = SharedTokenBucket(path, rate=1, capacity=2)
+        assert first.reserve('api', now=100) == 0
+        assert second.reserve('api', now=100) == 0
+        assert first.reserve('api', now=100) == pytest.approx(1), (
+            'Процессы должны делить одно ведро токенов'
+        )
+        assert second.reserve('api', now=104) == 0, (
+            'Ведро должно пополняться со временем'
+        )
+
+    def test_block_honours_retry_after(self, tmp_path):
+        limiter = QuotaLimiter(str(tmp_path / 'ratelimit.sqlite3'),
+                               rate=100, token_rate=100)
+        limiter.block('OAuth one', 30, now=100)
+        assert limiter.reserve('OAuth one', now=110) == pytest.approx(20), (
+            'После 429 запросы с токеном должны ждать Retry-After'
+        )
+        assert limiter.reserve('OAuth two', now=110) == 0, (
+            'Пауза после 429 не должна задевать другие токены'
+        )
+
+    def test_retry_after_formats(self):
+        assert retry_after('5') == 5
+        assert retry_after('Wed, 21 Oct 2015 07:28:10 GMT',
+                           now=1445412480) == 10
+        assert retry_after(None, default=7) == 7
+
+    def test_429_blocks_token(self, tmp_path, monkeypatch):
+        limiter = QuotaLimiter(str(tmp_path / 'ratelimit.sqlite3'),
+                               token_rate=100)
+        monkeypatch.setattr(homework, 'limiter', limiter)
+        monkeypatch.setattr(homework.transport, 'get',
+                            lambda **kwargs: ThrottledResponse())
+        with pytest.raises(RateLimitedError):
+            homework.fetch_api_answer(0, {'Authorization': 'OAuth one'})
+        with pytest.raises(RateLimitedError):
+            homework.quota_delay({'Authorization': 'OAuth one'},
+                                 deadline=homework.time.monotonic() + 30)
+
+    def test_429_retry_after_sets_schedule(self, monkeypatch):
+        monkeypatch.setattr(homework, 'limiter', None)
+        monkeypatch.setattr(homework.transport, 'get',
+                            lambda **kwargs: ThrottledResponse())
+        with pytest.raises(RateLimitedError) as error:
+            homework.fetch_api_answer(0, {'Authorization': 'OAuth one'})
+        assert error.value.retry_after == 120, (
+            'Исключение должно нести паузу из Retry-After'
+        )
+        schedule = homework.PollSchedule(jitter=0.5)
+        homework.record_failure(error.value, schedule=schedule)
+        assert schedule.delay >= 120, (
+            'Следующий опрос должен ждать не меньше Retry-After, '
+            'даже без общей квоты'
+        )
+
+    def test_skipped_reservations_do_not_starve(self, tmp_path):
+        bucket = SharedTokenBucket(str(tmp_path / 'ratelimit.sqlite3'),
+                                   rate=1)
+        for _ in range(40):
+            bucket.reserve('api', now=100, max_delay=5)
+        assert bucket.reserve('api', now=110, max_delay=5) == 0, (
+            'Пропущенные запросы не должны загонять ведро в долг'
+        )
+
+    def test_skipped_reservation_returns_global_token(self, tmp_path):
+        limiter = QuotaLimiter(str(tmp_path / 'ratelimit.sqlite3'),
+                               rate=1, token_rate=0.1)
+        assert limiter.reserve('OAuth one', now=100) == 0
+        assert limiter.reserve('OAuth one', now=100, max_delay=1) > 1
+        assert limiter.reserve('OAuth two', now=101, max_delay=0) == 0, (
+            'Квота токена не пустила запрос - общий токен надо вернуть'
+        )
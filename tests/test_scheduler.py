@@ -0,0 +1,29 @@
+from scheduler import PollSchedule
+
+
+class TestScheduler:
+
+    def test_reviewing_is_polled_more_often(self):
+        schedule = PollSchedule(interval=600, reviewing_interval=120)
+        assert schedule.success(changed=True, reviewing=True) == 120
+
+    def test_idle_backs_off_to_ceiling(self):
+        schedule = PollSchedule(interval=600, max_interval=1000,
+                                idle_factor=2)
+        assert schedule.success(changed=True, reviewing=False) == 600
+        delays = [schedule.success(changed=False, reviewing=False)
+                  for _ in range(3)]
+        assert delays == [1000, 1000, 1000], (
+            'Проверьте, что без изменений интервал растёт до потолка'
+        )
+
+    def test_errors_back_off_exponentially(self):
+        schedule = PollSchedule(error_interval=10, max_interval=1000,
+                                jitter=0)
+        assert [schedule.error() for _ in range(4)] == [10, 20, 40, 80]
+        schedule.success(changed=False, reviewing=False)
+        assert schedule.errors == 0
+
+    def test_jitter_stays_in_bounds(self):
+        schedule = PollSchedule(error_interval=100, jitter=0.5)
+        assert 50 <= schedule.error() <= 100
@@ -0,0 +1,127 @@
+import time
+
+from telegram.error import BadRequest, RetryAfter
+
+from ratelimit import TokenBucket
+from sender import DigestBot, LazyBot, MessageQueue
+from utils import RecordingBot
+
+
+class MockBot(RecordingBot):
+
+    def __init__(self, flood_once=False):
+        super().__init__()
+        self.flood_once = flood_once
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if self.flood_once:
+            self.flood_once = False
+            raise RetryAfter(0)
+        super().send_message(chat_id, text, **kwargs)
+
+
+class TestSender:
+
+    def test_chat_order_is_kept(self):
+        bot = MockBot()
+        messages = MessageQueue(bot, workers=3, global_rate=1000,
+                                chat_rate=1000).start()
+        for number in range(20):
+            messages.send_message(chat_id=number % 2, text=str(number))
+        messages.stop()
+        for chat_id in (0, 1):
+            texts = [int(text) for chat, text in bot.messages
+                     if chat == chat_id]
+            assert texts == sorted(texts), (
+                'Проверьте, что сообщения одного чата идут по порядку'
+            )
+        assert len(bot.messages) == 20
+
+    def test_retry_after_is_retried(self):
+        bot = MockBot(flood_once=True)
+        messages = MessageQueue(bot, workers=1, global_rate=1000,
+                                chat_rate=1000).start()
+        messages.send_message(chat_id=1, text='hello')
+        messages.stop()
+        assert bot.messages == [(1, 'hello')], (
+            'Проверьте, что после RetryAfter сообщение отправляется повторно'
+        )
+
+    def test_bad_request_is_not_retried(self):
+        calls = []
+
+        class RejectingBot:
+
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                calls.append(text)
+                raise BadRequest('Chat not found')
+
+        messages = MessageQueue(RejectingBot(), workers=1, global_rate=1000,
+                                chat_rate=1000).start()
+        started = time.monotonic()
+        messages.send_message(chat_id=1, text='hello')
+        messages.stop()
+        assert calls == ['hello'], (
+            'BadRequest не должен повторяться, как сетевая ошибка'
+        )
+        assert time.monotonic() - started < 1, (
+            'После BadRequest поток отправки не должен спать'
+        )
+
+    def test_token_bucket_delay(self):
+        bucket = TokenBucket(rate=10, capacity=1)
+        assert bucket.reserve() == 0
+        assert 0 < bucket.reserve() <= 0.1
+
+    def test_lazy_bot_is_built_once_on_send(self):
+        built = []
+
+        def factory():
+            built.append(MockBot())
+            return built[-1]
+
+        bot = LazyBot(factory)
+        assert not built, 'Бот не должен создаваться до первой отправки'
+        messages = MessageQueue(bot, workers=2, global_rate=1000,
+                                chat_rate=1000).start()
+        for number in range(4):
+            messages.send_message(chat_id=number, text='hello')
+        messages.stop()
+        assert len(built) == 1
+        assert len(built[0].messages) == 4
+
+    def test_digest_batches_chat_messages(self):
+        bot = MockBot()
+        digest = DigestBot(bot, window=60, max_items=3)
+        for number in range(4):
+            digest.send_message(chat_id=1, text=f'line {number}')
+        digest.send_message(chat_id=2, text='other')
+        assert bot.messages == [(1, 'line 0\nline 1\nline 2')], (
+            'Сводка должна уходить сразу при max_items сообщениях'
+        )
+        digest.flush()
+        assert bot.messages[1:] == [(1, 'line 3'), (2, 'other')]
+
+    def test_digest_respects_message_limit(self):
+        bot = MockBot()
+        digest = DigestBot(bot, window=60, max_items=100, limit=20)
+        for _ in range(3):
+            digest.send_message(chat_id=1, text='x' * 8)
+        digest.send_message(chat_id=1, text='y' * 45)
+        digest.flush()
+        assert all(len(text) <= 20 for _, text in bot.messages), (
+            'Сводка не должна превышать предел длины сообщения'
+        )
+        assert ''.join(text for _, text in bot.messages).replace(
+            '\n', '') == 'x' * 24 + 'y' * 45
+
+    def test_digest_window_flushes_in_background(self):
+        bot = MockBot()
+        digest = DigestBot(bot, window=0.05).start()
+        digest.send_message(chat_id=1, text='a')
+        digest.send_message(chat_id=1, text='b')
+        time.sleep(0.3)
+        assert bot.messages == [(1, 'a\nb')], (
+            'Сводка должна уходить по истечении окна'
+        )
+        digest.stop()
@@ -0,0 +1,127 @@
+import sqlite3
+
+from shards import HashRing, Shard
+from tenants import SCHEMA, TenantRegistry
+from tracker import StatusTracker
+
+NAMES = [f'student{number}' for number in range(200)]
+
+
+class TestShards:
+
+    def test_ring_moves_small_share(self):
+        before = HashRing(['a', 'b', 'c'])
+        after = HashRing(['a', 'b', 'c', 'd'])
+        moved = [name for name in NAMES
+                 if before.owner(name) != after.owner(name)]
+        assert all(after.owner(name) == 'd' for name in moved), (
+            'К новому воркеру должны переезжать только его подопечные'
+        )
+        assert len(moved) < len(NAMES) / 2, (
+            'Новый воркер не должен забирать большую часть подопечных'
+        )
+
+    def test_workers_split_without_overlap(self, tmp_path):
+        path = str(tmp_path / 'leases.sqlite3')
+        first = Shard(path, worker='first', ttl=60)
+        second = Shard(path, worker='second', ttl=60)
+        first.rebalance(NAMES, now=0)
+        assert first.owned == set(NAMES)
+        second.rebalance(NAMES, now=1)
+        assert not second.owned, (
+            'Чужую живую аренду забирать нельзя'
+        )
+        first.rebalance(NAMES, now=2)
+        second.rebalance(NAMES, now=3)
+        assert first.owned and second.owned
+        assert not first.owned & second.owned, (
+            'Подопечный не должен принадлежать двум воркерам сразу'
+        )
+        assert first.owned | second.owned == set(NAMES)
+
+    def test_crashed_worker_leases_expire(self, tmp_path):
+        path = str(tmp_path / 'leases.sqlite3')
+        crashed = Shard(path, worker='crashed', ttl=10)
+        alive = Shard(path, worker='alive', ttl=10)
+        crashed.rebalance(NAMES, now=0)
+        alive.rebalance(NAMES, now=1)
+        alive.rebalance(NAMES, now=5)
+        assert alive.owned != set(NAMES)
+        alive.rebalance(NAMES, now=20)
+        assert alive.owned == set(NAMES), (
+            'После истечения аренды подопечных упавшего воркера '
+            'должны забрать живые'
+        )
+
+    def test_assign_limits_registry(self, tmp_path):
+        path = str(tmp_path / 'tenants.sqlite3')
+        with sqlite3.connect(path) as connection:
+            connection.execute(SCHEMA)
+            connection.executemany(
+                "INSERT INTO tenants VALUES (?, 'token', '1', 100, 60)",
+                [(name,) for name in NAMES[:20]])
+        registry = TenantRegistry(path)
+        leases = str(tmp_path / 'leases.sqlite3')
+        first = Shard(leases, worker='first')
+        Shard(leases, worker='second').rebalance([])
+        first.assign(registry, StatusTracker())
+        assert {tenant.name for tenant in registry.due()} == first.owned, (
+            'Воркер должен опрашивать только своих подопечных'
+        )
+        first.release()
+        assert not first.owned
+
+    def test_renew_keeps_leases_during_long_cycle(self, tmp_path):
+        path = str(tmp_path / 'leases.sqlite3')
+        busy = Shard(path, worker='busy', ttl=10)
+        other = Shard(path, worker='other', ttl=10)
+        busy.rebalance(NAMES, now=0)
+        for now in (4, 8, 12, 16):
+            busy.renew(now=now)
+        other.rebalance(NAMES, now=20)
+        assert not other.owned & busy.owned, (
+            'Продлённую посреди цикла аренду забирать нельзя'
+        )
+        assert busy.holds(NAMES[0], now=20)
+        assert not busy.holds(NAMES[0], now=30), (
+            'Без продления аренда должна считаться истёкшей'
+        )
+
+    def test_renew_after_pause_drops_taken_leases(self, tmp_path):
+        path = str(tmp_path / 'leases.sqlite3')
+        paused = Shard(path, worker='paused', ttl=10)
+        other = Shard(path, worker='other', ttl=10)
+        paused.rebalance(NAMES, now=0)
+        other.rebalance(NAMES, now=20)
+        paused.renew(now=21)
+        assert not any(paused.holds(name, now=21) for name in NAMES), (
+            'После паузы дольше ttl чужую аренду держать нельзя'
+        )
+        gained, lost = paused.rebalance(NAMES, now=22)
+        assert lost and not lost & paused.owned, (
+            'Потерянные при продлении подопечные должны уйти в lost'
+        )
+
+    def test_tenant_without_lease_is_not_polled(self, tmp_path,
+                                                monkeypatch):
+        import cohort
+
+        path = str(tmp_path / 'tenants.sqlite3')
+        with sqlite3.connect(path) as connection:
+            connection.execute(SCHEMA)
+            connection.execute(
+                "INSERT INTO tenants VALUES ('student0', 'token', '1', "
+                "100, 60)")
+        registry = TenantRegistry(path)
+        shard = Shard(str(tmp_path / 'leases.sqlite3'), worker='only',
+                      ttl=60)
+        # аренда взята давно и с тех пор не продлевалась
+        shard.rebalance(list(registry.tenants), now=0)
+        polled = []
+        monkeypatch.setattr(cohort, 'poll_once',
+                            lambda *args: polled.append(args) or 200)
+        tenant = registry.tenants['student0']
+        assert cohort.poll_tenant(None, tenant, shard=shard) is False
+        assert not polled, (
+            'Подопечного с истёкшей арендой опрашивать нельзя'
+        )
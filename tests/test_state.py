@@ -0,0 +1,38 @@
+from state import StateStore
+from tracker import StatusTracker
+from utils import RecordingBot
+
+
+class TestState:
+
+    def test_cursor_survives_restart(self, tmp_path):
+        path = str(tmp_path / 'state.sqlite3')
+        state = StateStore(path)
+        assert state.load_cursor(default=5) == 5
+        state.save_cycle(100, {'1': 'reviewing'})
+        state.close()
+
+        state = StateStore(path)
+        assert state.load_cursor(default=5) == 100, (
+            'Проверьте, что курсор current_date сохраняется между запусками'
+        )
+        assert state.load_statuses() == {'1': 'reviewing'}
+
+    def test_delivered_status_is_not_repeated(self):
+        import homework
+
+        state = StateStore(':memory:')
+        tracker = StatusTracker(state)
+        bot = RecordingBot()
+        response = {
+            'homeworks': [
+                {'id': 1, 'homework_name': 'hw', 'status': 'reviewing'}
+            ],
+            'current_date': 10
+        }
+        assert homework.process_response(bot, 1, response, 0, tracker) == 10
+        assert homework.process_response(bot, 1, response, 10, tracker) == 10
+        assert len(bot.messages) == 1, (
+            'Проверьте, что доставленный статус не отправляется повторно'
+        )
+        assert state.load_cursor() == 10
@@ -0,0 +1,46 @@
+import json
+import sqlite3
+
+from tenants import SCHEMA, TenantRegistry
+
+
+class TestTenants:
+
+    def test_json_registry_saves_cursor(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'name': 'student', 'practicum_token': 'token',
+             'chat_id': '1', 'from_date': 100, 'interval': 60}
+        ]))
+        registry = TenantRegistry(str(path))
+        tenant = registry.tenants['student']
+        assert tenant.headers == {'Authorization': 'OAuth token'}
+        tenant.from_date = 200
+        registry.save()
+        assert TenantRegistry(str(path)).tenants['student'].from_date == 200, (
+            'Проверьте, что курсор from_date сохраняется в JSON'
+        )
+
+    def test_sqlite_registry_saves_cursor(self, tmp_path):
+        path = str(tmp_path / 'tenants.sqlite3')
+        with sqlite3.connect(path) as connection:
+            connection.execute(SCHEMA)
+            connection.execute(
+                "INSERT INTO tenants VALUES ('student', 'token', '1', 100, 60)"
+            )
+        registry = TenantRegistry(path)
+        registry.tenants['student'].from_date = 300
+        registry.save()
+        assert TenantRegistry(path).tenants['student'].from_date == 300, (
+            'Проверьте, что курсор from_date сохраняется в SQLite'
+        )
+
+    def test_due_tenants(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'name': 'a', 'practicum_token': 't', 'chat_id': '1'},
+            {'name': 'b', 'practicum_token': 't', 'chat_id': '2'},
+        ]))
+        registry = TenantRegistry(str(path))
+        registry.tenants['a'].reschedule(now=1000)
+        assert [t.name for t in registry.due(now=1000)] == ['b']
@@ -0,0 +1,60 @@
+from models import Homework, Verdict
+from state import StateStore
+from tracker import StatusTracker
+from utils import RecordingBot
+
+
+class TestTracker:
+
+    def test_every_changed_homework_is_reported(self):
+        import homework
+
+        bot = RecordingBot()
+        tracker = StatusTracker()
+        homeworks = [
+            {'id': 2, 'homework_name': 'hw2', 'status': 'approved'},
+            {'id': 1, 'homework_name': 'hw1', 'status': 'reviewing'},
+        ]
+        delivered = homework.report_homeworks(bot, 1, homeworks, tracker)
+        assert delivered == {'1': 'reviewing', '2': 'approved'}, (
+            'Проверьте, что отправляются статусы всех домашек из ответа'
+        )
+        assert bot.texts[0].startswith(
+            'Изменился статус проверки работы "hw1"'
+        )
+
+        homeworks[1]['status'] = 'rejected'
+        homework.report_homeworks(bot, 1, homeworks, tracker)
+        assert len(bot.messages) == 3, (
+            'Проверьте, что повторно отправляются только изменившиеся статусы'
+        )
+
+    def test_bad_homework_does_not_block_others(self):
+        import homework
+
+        bot = RecordingBot()
+        response = {
+            'homeworks': [
+                {'id': 1, 'homework_name': 'hw1', 'status': 'unknown'},
+                'не словарь',
+                {'id': 2, 'homework_name': 'hw2', 'status': 'approved'},
+            ],
+            'current_date': 10,
+        }
+        timestamp = homework.process_response(bot, 1, response, 0,
+                                              StatusTracker())
+        assert len(bot.messages) == 1 and 'hw2' in bot.texts[0], (
+            'Битая домашка не должна мешать отправке остальных'
+        )
+        assert timestamp == 10, (
+            'Курсор должен продвигаться, даже если в ответе есть битая '
+            'домашка'
+        )
+
+    def test_index_is_loaded_from_state(self):
+        state = StateStore(':memory:')
+        state.save_cycle(1, {'1': 'approved'}, tenant='student')
+        tracker = StatusTracker(state)
+        homeworks = [Homework(1, 'hw', Verdict.APPROVED)]
+        assert tracker.changes(homeworks, 'student') == []
+        assert tracker.changes(homeworks, 'other') == homeworks
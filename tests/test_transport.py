@@ -0,0 +1,149 @@
+import socket
+import threading
+import time
+
+import pytest
+import requests
+
+import transport
+from loadtest.stubs import API_PATH, PracticumHandler, PracticumStub, serve
+
+
+class TestTransport:
+
+    def test_session_pool_and_retries(self):
+        session = transport.create_session(pool_size=7, retries=2)
+        adapter = session.get_adapter(
+            'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+        )
+        assert adapter._pool_maxsize == 7, (
+            'Проверьте, что размер пула соединений настраивается'
+        )
+        assert adapter.max_retries.total == 2, (
+            'Проверьте, что число повторов настраивается'
+        )
+
+    def test_session_is_shared(self):
+        transport.close_session()
+        assert transport.get_session() is transport.get_session(), (
+            'Проверьте, что сессия создаётся один раз и переиспользуется'
+        )
+        transport.close_session()
+
+    def test_timeout_is_capped_by_deadline(self):
+        connect, read = transport.request_timeout(time.monotonic() + 1)
+        assert connect <= 1 and read <= 1, (
+            'Проверьте, что таймауты не выходят за бюджет цикла'
+        )
+        with pytest.raises(requests.exceptions.Timeout):
+            transport.request_timeout(time.monotonic() - 1)
+
+    def test_retries_stay_within_deadline(self):
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen(8)
+        held = []
+
+        def accept():
+            while True:
+                try:
+                    held.append(server.accept()[0])
+                except OSError:
+                    return
+
+        threading.Thread(target=accept, daemon=True).start()
+        transport.configure(retries=3, read_timeout=10)
+        started = time.monotonic()
+        try:
+            with pytest.raises(requests.exceptions.RequestException):
+                transport.get(
+                    url=f'http://127.0.0.1:{server.getsockname()[1]}/',
+                    deadline=time.monotonic() + 1.5)
+            elapsed = time.monotonic() - started
+        finally:
+            transport.close_session()
+            server.close()
+            for connection in held:
+                connection.close()
+        assert elapsed < 2.5, (
+            'Повторы транспорта не должны выходить за бюджет цикла'
+        )
+
+    def test_connect_only_leaves_5xx_to_policies(self):
+        stub = PracticumStub(error_rate=1.0)
+        server = serve(PracticumHandler, stub)
+        transport.configure(retries=3, connect_only=True)
+        try:
+            response = transport.get(
+                url=f'http://127.0.0.1:{server.server_address[1]}{API_PATH}',
+                headers={'Authorization': 'OAuth t'},
+                deadline=time.monotonic() + 10)
+        finally:
+            transport.close_session()
+            server.shutdown()
+        assert response.status_code == 500
+        assert stub.requests == 1, (
+            'Ответ 5xx должна повторять таблица политик, а не транспорт'
+        )
+
+    def test_slow_request_is_hedged(self):
+        hedger = transport.Hedger(0.5, min_samples=1)
+        hedger._latencies.append(0.01)
+        calls = []
+        lock = threading.Lock()
+
+        class Response:
+            def __init__(self, number):
+                self.number = number
+
+            def close(self):
+                pass
+
+        def send(**params):
+            with lock:
+                number = len(calls)
+                calls.append(number)
+            if number == 0:
+                time.sleep(0.5)
+            return Response(number)
+
+        assert hedger.get(send).number == 1, (
+            'Проверьте, что при задержке используется ответ дубля'
+        )
+        assert len(calls) == 2
+
+    def test_hedges_are_capped_and_take_quota(self):
+        hedger = transport.Hedger(0, min_samples=1, share=0, burst=1)
+        hedger._latencies.append(0.01)
+        calls = []
+        lock = threading.Lock()
+
+        class Response:
+            def close(self):
+                pass
+
+        def send(**params):
+            with lock:
+                calls.append(threading.current_thread().name)
+            time.sleep(0.05)
+            return Response()
+
+        hedger.get(send, quota=lambda: False)
+        assert len(calls) == 1, 'Дубль без квоты отправлять нельзя'
+        for _ in range(3):
+            hedger.get(send)
+        assert len(calls) == 5, (
+            'Дублей не должно быть больше разрешённой доли запросов'
+        )
+
+    def test_request_without_latency_data_runs_in_caller(self):
+        hedger = transport.Hedger(0.5, min_samples=10)
+        threads = []
+
+        def send(**params):
+            threads.append(threading.current_thread())
+
+        hedger.get(send)
+        assert threads == [threading.current_thread()], (
+            'Запрос без дубля должен идти в потоке вызывающего'
+        )
@@ -37,3 +37,18 @@ def check_default_var_exists(scope: ModuleType, var_name: str) -> None:
         f'{var_name} должна быть переменной, а не функцией.'
     )
 
+
+
+class RecordingBot:
+    """Fake telegram bot that records sent messages as (chat_id, text)"""
+
+    def __init__(self):
+        self.messages = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.messages.append((chat_id, text))
+
+    @property
+    def texts(self) -> list:
+        """Texts of the sent messages in order"""
+        return [text for _, text in self.messages]
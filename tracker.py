@@ -0,0 +1,63 @@
+"""Поиск изменившихся статусов домашек между циклами опроса."""
+import threading
+
+from models import Homework, intern_status
+from state import DEFAULT_TENANT, StateStore
+
+
+class StatusTracker:
+    """Индекс известных статусов в памяти: домашка -> статус.
+
+    Индекс подопечного читается из StateStore одним запросом при первом
+    обращении, дальше проверка каждой домашки - поиск в словаре.
+    """
+
+    def __init__(self, state: StateStore = None):
+        """индекс поднимается из хранилища state и пишется в него."""
+        self.state = state
+        self._index = {}
+        self._lock = threading.Lock()
+
+    def known(self, tenant: str = DEFAULT_TENANT) -> dict:
+        """известные статусы домашек подопечного."""
+        index = self._index.get(tenant)
+        if index is None:
+            with self._lock:
+                index = self._index.get(tenant)
+                if index is None:
+                    index = {}
+                    if self.state is not None:
+                        index = {
+                            key: intern_status(status) for key, status
+                            in self.state.load_statuses(tenant).items()}
+                    self._index[tenant] = index
+        return index
+
+    def changes(self, records: list, tenant: str = DEFAULT_TENANT) -> list:
+        """домашки, статус которых отличается от известного.
+
+        API отдаёт работы от новых к старым, возвращаем их по порядку
+        изменений.
+        """
+        index = self.known(tenant)
+        return [homework for homework in reversed(records)
+                if index.get(homework.key) != homework.status]
+
+    def has_status(self, status: str, tenant: str = DEFAULT_TENANT) -> bool:
+        """есть ли у подопечного домашка в статусе status."""
+        return status in self.known(tenant).values()
+
+    def mark(self, homework: Homework, tenant: str = DEFAULT_TENANT):
+        """запоминаем доставленный статус домашки."""
+        self.known(tenant)[homework.key] = homework.status
+
+    def forget(self, tenant: str = DEFAULT_TENANT):
+        """сбрасываем индекс подопечного, он перечитается из хранилища."""
+        with self._lock:
+            self._index.pop(tenant, None)
+
+    def save_cycle(self, current_date: int, delivered: dict,
+                   tenant: str = DEFAULT_TENANT):
+        """сохраняем итог цикла в хранилище, если оно есть."""
+        if self.state is not None:
+            self.state.save_cycle(current_date, delivered, tenant)
@@ -0,0 +1,271 @@
+"""HTTP-транспорт бота: общий пул keep-alive соединений к API домашки."""
+import threading
+import time
+from collections import deque
+from concurrent.futures import (FIRST_COMPLETED,
+                                Future,
+                                ThreadPoolExecutor,
+                                wait)
+from typing import TYPE_CHECKING
+
+import metrics
+
+if TYPE_CHECKING:
+    import requests
+
+# коды, при которых запрос повторяется на уровне транспорта
+RETRY_STATUSES = (500, 502, 503, 504)
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+# дубли запросов - только после стольких замеров задержки
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+HEDGE_WORKERS = 16
+# дублей не больше такой доли запросов, запас - на всплеск
+HEDGE_SHARE = 0.1
+HEDGE_BURST = 5
+
+_session = None
+_timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+_hedger = None
+# бюджет текущего запроса в этом потоке: deadline и длительность попытки
+_budget = threading.local()
+
+
+def deadline_retry(**options):
+    """Retry urllib3, который не начинает попытку, не влезающую в бюджет.
+
+    Бюджет запроса get() передаёт через _budget: сама Retry общая
+    для всех запросов адаптера.
+    """
+    from urllib3.exceptions import MaxRetryError
+    from urllib3.util.retry import Retry
+
+    class DeadlineRetry(Retry):
+
+        def increment(self, method=None, url=None, response=None,
+                      error=None, _pool=None, _stacktrace=None):
+            retry = super().increment(method, url, response, error,
+                                      _pool, _stacktrace)
+            deadline = getattr(_budget, 'deadline', None)
+            if deadline is None:
+                return retry
+            pause = retry.get_backoff_time()
+            if response is not None and retry.respect_retry_after_header:
+                pause = max(pause, retry.get_retry_after(response) or 0)
+            if time.monotonic() + pause + _budget.attempt > deadline:
+                raise MaxRetryError(_pool, url, error or 'бюджет исчерпан')
+            return retry
+
+    return DeadlineRetry(**options)
+
+
+def create_session(pool_size: int = 10,
+                   retries: int = 3,
+                   backoff_factor: float = 0.5,
+                   connect_only: bool = False) -> 'requests.Session':
+    """создаём сессию с пулом соединений и повторами запросов.
+
+    connect_only оставляет только повторы установки соединения: ответы
+    5xx и обрывы чтения повторяет вызывающий код по своей политике.
+    requests импортируется здесь, а не при импорте модуля.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    if connect_only:
+        options = dict(connect=retries, read=0, status=0, other=0)
+    else:
+        options = dict(status_forcelist=RETRY_STATUSES)
+    retry = deadline_retry(total=retries,
+                           backoff_factor=backoff_factor,
+                           allowed_methods=frozenset({'GET'}),
+                           raise_on_status=False,
+                           **options)
+    adapter = HTTPAdapter(pool_connections=pool_size,
+                          pool_maxsize=pool_size,
+                          max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Connection'] = 'keep-alive'
+    return session
+
+
+def configure(connect_timeout: float = CONNECT_TIMEOUT,
+              read_timeout: float = READ_TIMEOUT,
+              hedge_percentile: float = 0,
+              **options) -> 'requests.Session':
+    """пересоздаём общую сессию с новыми настройками.
+
+    hedge_percentile=0 выключает дублирующие запросы.
+    """
+    global _timeout, _hedger
+    close_session()
+    set_session(create_session(**options))
+    _timeout = (connect_timeout, read_timeout)
+    _hedger = Hedger(hedge_percentile) if hedge_percentile else None
+    return _session
+
+
+def set_session(session):
+    """подменяем общую сессию (например, в тестах)."""
+    global _session
+    _session = session
+
+
+def get_session() -> 'requests.Session':
+    """возвращаем общую сессию, создавая её при первом обращении."""
+    if _session is None:
+        set_session(create_session())
+    return _session
+
+
+def close_session():
+    """закрываем соединения общей сессии."""
+    if _session is not None:
+        _session.close()
+        set_session(None)
+
+
+def request_timeout(deadline: float = None) -> tuple:
+    """таймауты соединения и чтения, не дальше deadline (monotonic)."""
+    if deadline is None:
+        return _timeout
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        from requests.exceptions import Timeout
+
+        raise Timeout('бюджет времени цикла исчерпан')
+    connect, read = _timeout
+    return min(connect, remaining), min(read, remaining)
+
+
+class Hedger:
+    """Дублирует запрос, если первый отвечает дольше обычного.
+
+    Пул потоков - только для дублей. Дублей не больше доли share от
+    всех запросов (с запасом burst), и каждый дубль берёт свою квоту.
+    """
+
+    def __init__(self, percentile: float,
+                 min_samples: int = HEDGE_MIN_SAMPLES,
+                 window: int = LATENCY_WINDOW,
+                 workers: int = HEDGE_WORKERS,
+                 share: float = HEDGE_SHARE,
+                 burst: float = HEDGE_BURST):
+        """перцентиль percentile - доля от 0 до 1, например 0.95."""
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.share = share
+        self.burst = burst
+        self._budget = burst
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix='hedge')
+
+    def delay(self):
+        """сколько ждать первый ответ до дубля, None - мало данных."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        index = min(int(len(latencies) * self.percentile),
+                    len(latencies) - 1)
+        return latencies[index]
+
+    def _take_hedge(self) -> bool:
+        with self._lock:
+            if self._budget < 1:
+                return False
+            self._budget -= 1
+            return True
+
+    def _timed(self, send, params: dict):
+        started = time.monotonic()
+        response = send(**params)
+        with self._lock:
+            self._latencies.append(time.monotonic() - started)
+        return response
+
+    def _run(self, future: Future, started: threading.Event, send,
+             params: dict):
+        future.set_running_or_notify_cancel()
+        started.set()
+        try:
+            future.set_result(self._timed(send, params))
+        except BaseException as error:
+            future.set_exception(error)
+
+    def get(self, send, quota=None, **params):
+        """запрос через send, при задержке - второй такой же.
+
+        quota() берёт квоту на дубль и возвращает False, если её нет.
+        Без замеров задержки запрос идёт в потоке вызывающего, иначе -
+        в своём потоке, чтобы вернуть ответ дубля, не дожидаясь первого.
+        """
+        with self._lock:
+            self._budget = min(self.burst, self._budget + self.share)
+        delay = self.delay()
+        if delay is None:
+            return self._timed(send, params)
+        first = Future()
+        started = threading.Event()
+        threading.Thread(target=self._run, name='hedge-first',
+                         args=(first, started, send, params),
+                         daemon=True).start()
+        # отсчёт паузы - с начала запроса, а не с постановки в очередь
+        started.wait()
+        done, _ = wait([first], timeout=delay)
+        if done or not self._take_hedge():
+            return first.result()
+        if quota is not None and not quota():
+            with self._lock:
+                self._budget += 1
+            return first.result()
+        metrics.hedged_requests.inc()
+        second = self._executor.submit(self._timed, send, params)
+        pending = {first, second}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for late in pending:
+                        late.add_done_callback(_close_response)
+                    return future.result()
+        return first.result()
+
+
+def _close_response(future):
+    if future.exception() is None:
+        future.result().close()
+
+
+def _budgeted(send, deadline: float):
+    """send, повторы которого внутри urllib3 не выходят за deadline."""
+    def budgeted(**params):
+        timeout = params.get('timeout') or 0
+        _budget.deadline = deadline
+        _budget.attempt = (sum(timeout) if isinstance(timeout, tuple)
+                           else timeout)
+        try:
+            return send(**params)
+        finally:
+            _budget.deadline = None
+    return budgeted
+
+
+def get(deadline: float = None, quota=None, **params):
+    """GET-запрос через общую сессию с таймаутами.
+
+    С deadline повторы транспорта не начинаются, если попытка с
+    полным таймаутом не успеет до него. quota - см. Hedger.get.
+    """
+    params.setdefault('timeout', request_timeout(deadline))
+    send = get_session().get
+    if deadline is not None:
+        send = _budgeted(send, deadline)
+    if _hedger is None:
+        return send(**params)
+    return _hedger.get(send, quota=quota, **params)